@@ -0,0 +1,102 @@
+"""Benchmark del bucle de descarga: iter_content de 8 KiB vs core.transfer.stream_response.
+
+Levanta un servidor HTTP local que sirve un payload en memoria y mide, para
+cada variante, el tiempo total, el throughput y cuántas veces se llamó al
+callback de progreso (cada llamada en la UI es una emisión de señal Qt).
+
+Uso:
+    python benchmarks/bench_transfer.py [--size-mb 100] [--rounds 3]
+"""
+import argparse
+import http.server
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import transfer  # noqa: E402
+from core.http import get_session  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        view = memoryview(payload)
+        for offset in range(0, len(payload), 256 * 1024):
+            self.wfile.write(view[offset:offset + 256 * 1024])
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def legacy_loop(url, filepath, callback):
+    """Bucle previo de TikTok/Instagram: bloques fijos de 8 KiB, callback por bloque"""
+    with get_session().get(url, stream=True, timeout=30) as response:
+        total = int(response.headers.get('content-length', 0))
+        downloaded = 0
+        with open(filepath, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    callback(downloaded / total)
+
+
+def stream_loop(url, filepath, callback):
+    """Escritor compartido: readinto adaptativo, buffer grande, progreso con throttling"""
+    with get_session().get(url, stream=True, timeout=30) as response:
+        total = int(response.headers.get('content-length', 0))
+        progress = transfer._Progress(total, callback)
+        with open(filepath, 'wb', buffering=transfer.WRITE_BUFFER) as f:
+            transfer.stream_response(response, f, progress.add)
+
+
+def run(name, fn, url, filepath, size, rounds):
+    best = None
+    callbacks = 0
+    for _ in range(rounds):
+        calls = []
+        started = time.perf_counter()
+        fn(url, filepath, calls.append)
+        elapsed = time.perf_counter() - started
+        if os.path.getsize(filepath) != size:
+            raise SystemExit(f"{name}: tamaño incorrecto")
+        if best is None or elapsed < best:
+            best, callbacks = elapsed, len(calls)
+    print(f"{name:<16} {best:7.3f} s  {size / best / 1024 / 1024:8.1f} MB/s  {callbacks:>7} callbacks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.payload = os.urandom(args.size_mb * 1024 * 1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/payload"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, 'payload.bin')
+        print(f"Payload: {args.size_mb} MB, mejor de {args.rounds} rondas")
+        run('iter_content 8K', legacy_loop, url, filepath, len(server.payload), args.rounds)
+        run('stream_response', stream_loop, url, filepath, len(server.payload), args.rounds)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
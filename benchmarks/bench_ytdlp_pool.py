@@ -0,0 +1,112 @@
+"""Benchmark de YoutubeDL: una instancia nueva por URL vs core.ytdlp_pool.
+
+Levanta un servidor HTTP local con N enlaces directos de audio y extrae la
+metadata de todos (extractor genérico, sin descargar) con cada variante:
+construyendo un YoutubeDL por URL, como hacían los downloaders, o tomándolo
+prestado del pool. Mide el tiempo total del lote, el costo medio por URL y
+cuántas conexiones TCP abrió el servidor.
+
+Uso:
+    python benchmarks/bench_ytdlp_pool.py [--urls 100] [--workers 4] [--rounds 3]
+"""
+import argparse
+import http.server
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp import YoutubeDL  # noqa: E402
+
+from core.ytdlp_pool import YdlPool, profile_options  # noqa: E402
+
+
+PAYLOAD = b'\xff\xfb\x90\x00' + bytes(4092)  # Cabecera MP3 + relleno
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _headers(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers()
+
+    def do_GET(self):
+        self._headers()
+        self.wfile.write(PAYLOAD)
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def fresh_extract(url):
+    """Como antes: un YoutubeDL construido y cerrado por cada URL"""
+    with YoutubeDL(profile_options('info')) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def pooled_extract_factory(pool):
+    def pooled_extract(url):
+        with pool.lease('info') as ydl:
+            return ydl.extract_info(url, download=False)
+    return pooled_extract
+
+
+def run(name, fn, urls, workers, rounds, server):
+    best = None
+    connections = 0
+    for _ in range(rounds):
+        server.connections = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fn, urls))
+        elapsed = time.perf_counter() - started
+        if any(not info or not info.get('url') for info in results):
+            raise SystemExit(f"{name}: extracción incompleta")
+        if best is None or elapsed < best:
+            best, connections = elapsed, server.connections
+    print(f"{name:<14} {best:7.3f} s  {best / len(urls) * 1000:7.1f} ms/URL  {connections:>5} conexiones")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    server = _Server(('127.0.0.1', 0), _Handler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/clip-{i}.mp3" for i in range(args.urls)]
+
+    pool = YdlPool(size=args.workers)
+    print(f"{args.urls} URLs, {args.workers} hilos, mejor de {args.rounds} rondas")
+    run('YoutubeDL/URL', fresh_extract, urls, args.workers, args.rounds, server)
+    run('ytdlp_pool', pooled_extract_factory(pool), urls, args.workers, args.rounds, server)
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import threading
+import time
+
+from core.paths import app_data_dir
+
+
+class DownloadArchive:
+    """Registro persistente (SQLite) de lo que ya se descargó.
+
+    Cada entrada se identifica por (plataforma, extractor, id) — p. ej.
+    ('YouTube', 'youtube', 'dQw4w9WgXcQ') o ('Instagram', 'instagram', shortcode) —
+    y guarda el título y la ruta final del archivo. Con verify_files=True una
+    entrada cuyo archivo ya no existe en disco se descarta y se vuelve a bajar.
+    """
+
+    def __init__(self, db_path: str = None, verify_files: bool = True):
+        self.db_path = db_path or os.path.join(app_data_dir(), "archive.sqlite3")
+        self.verify_files = verify_files
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    platform   TEXT NOT NULL,
+                    extractor  TEXT NOT NULL,
+                    item_id    TEXT NOT NULL,
+                    title      TEXT,
+                    filepath   TEXT,
+                    created_at REAL,
+                    PRIMARY KEY (platform, extractor, item_id)
+                )
+            """)
+            self._conn.commit()
+
+    def lookup(self, platform: str, extractor: str, item_id: str, verify_files: bool = None):
+        """Devuelve {'title', 'filepath'} si ya se descargó, o None"""
+        if not extractor or not item_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, filepath FROM downloads WHERE platform=? AND extractor=? AND item_id=?",
+                (platform, extractor, str(item_id))
+            ).fetchone()
+        if row is None:
+            return None
+
+        title, filepath = row
+        verify = self.verify_files if verify_files is None else verify_files
+        if verify and not (filepath and os.path.exists(filepath)):
+            self.remove(platform, extractor, item_id)
+            return None
+        return {'title': title, 'filepath': filepath}
+
+    def add(self, platform: str, extractor: str, item_id: str, title: str = None, filepath: str = None):
+        if not extractor or not item_id:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)",
+                (platform, extractor, str(item_id), title, filepath, time.time())
+            )
+            self._conn.commit()
+
+    def remove(self, platform: str, extractor: str, item_id: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM downloads WHERE platform=? AND extractor=? AND item_id=?",
+                (platform, extractor, str(item_id))
+            )
+            self._conn.commit()
+
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+
+def get_archive() -> DownloadArchive:
+    """Archivo de descargas compartido por todos los Downloader del proceso"""
+    global _default_archive
+    with _default_lock:
+        if _default_archive is None:
+            _default_archive = DownloadArchive()
+        return _default_archive
@@ -1,23 +1,134 @@
+# Core module
 from abc import ABC, abstractmethod
 
 
 class Downloader(ABC):
     """Clase base para todos los descargadores de contenido"""
-    
-    def __init__(self, platform_name: str):
+
+    def __init__(self, platform_name: str, archive=None, session=None, info_cache=None):
         self.platform_name = platform_name
-    
+        # Session HTTP inyectable. None = pool compartido del proceso (core.http)
+        self._session = session
+        # Archivo de descargas (core.archive). None = usar el compartido del proceso
+        self._archive = archive
+        # Caché de metadata (core.info_cache). None = usar la compartida del proceso
+        self._info_cache = info_cache
+        self.use_archive = True
+
+    @property
+    def http(self):
+        """Session HTTP con keep-alive y reintentos para las peticiones del descargador"""
+        if self._session is not None:
+            return self._session
+        from core.http import get_session
+        return get_session()
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            from core.archive import get_archive
+            self._archive = get_archive()
+        return self._archive
+
+    @property
+    def info_cache(self):
+        if self._info_cache is None:
+            from core.info_cache import get_info_cache
+            self._info_cache = get_info_cache()
+        return self._info_cache
+
+    def info_cache_key(self, url: str, kind: str = 'info'):
+        """Clave de caché: el id de archive_key si se conoce, si no la URL normalizada"""
+        key = self.archive_key(url)
+        if key:
+            return (self.platform_name, kind, *key)
+        from core.info_cache import normalize_url
+        return (self.platform_name, kind, normalize_url(url))
+
+    def cached_info(self, url: str, fetch, kind: str = 'info', refresh: bool = False):
+        """
+        Metadata de la caché compartida entre vista previa y descarga
+
+        Args:
+            url: URL del contenido (se normaliza para la clave)
+            fetch: Función sin argumentos que obtiene la info si no está en caché
+            kind: Distingue varias vistas del mismo contenido (p. ej. 'images')
+            refresh: Ignorar la entrada guardada (p. ej. si su URL directa ya venció)
+
+        Returns:
+            El dict de info, o lo que devuelva fetch si falla (no se guarda)
+        """
+        try:
+            key = self.info_cache_key(url, kind)
+        except Exception:
+            return fetch()
+        if not refresh:
+            info = self.info_cache.get(key)
+            if info is not None:
+                return info
+        info = fetch()
+        if info:
+            self.info_cache.put(key, info)
+        return info
+
+    def invalidate_info(self, url: str, kind: str = 'info'):
+        """Descarta la metadata cacheada de url (p. ej. tras una descarga fallida)"""
+        try:
+            self.info_cache.invalidate(self.info_cache_key(url, kind))
+        except Exception:
+            pass
+
+    def archive_key(self, url: str):
+        """
+        Identifica el contenido de una URL sin tocar la red (o lo mínimo posible)
+
+        Returns:
+            (extractor: str, item_id: str) o None si no se puede determinar
+        """
+        return None
+
+    def check_archive(self, url: str = None, key=None):
+        """
+        Consulta el archivo de descargas antes de cualquier trabajo de red
+
+        Returns:
+            Título guardado si el contenido ya fue descargado, None si no
+        """
+        if not self.use_archive:
+            return None
+        try:
+            key = key or self.archive_key(url)
+            if not key:
+                return None
+            entry = self.archive.lookup(self.platform_name, *key)
+        except Exception as e:
+            print(f"⚠️ No se pudo consultar el archivo de descargas: {e}")
+            return None
+        if entry is None:
+            return None
+        print(f"⏭ Ya descargado, se omite: {entry['title']}")
+        return entry['title'] or key[1]
+
+    def record_archive(self, key, title: str, filepath: str = None):
+        """Registra una descarga exitosa en el archivo de descargas"""
+        if not self.use_archive or not key:
+            return
+        try:
+            self.archive.add(self.platform_name, key[0], key[1], title, filepath)
+        except Exception as e:
+            print(f"⚠️ No se pudo registrar en el archivo de descargas: {e}")
+
     @abstractmethod
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
         """
         Descarga audio desde la plataforma
-        
+
         Args:
             url: URL del contenido
             output_path: Ruta donde guardar el archivo
             progress_callback: Función para reportar progreso (percent, speed, eta)
             title_callback: Función para reportar el título
-        
+
         Returns:
             (success: bool, title: str)
         """
@@ -0,0 +1,58 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Pool HTTP compartido por downloaders y threads de la UI.
+# Un único HTTPAdapter (urllib3 PoolManager, thread-safe) mantiene las
+# conexiones keep-alive; cada hilo usa su propio Session montado sobre él,
+# así las cookies/headers de un hilo no se pisan con los de otro.
+POOL_HOSTS = 32          # hosts distintos con pool propio
+POOL_PER_HOST = 10       # conexiones keep-alive conservadas por host
+RETRIES = 3
+BACKOFF_FACTOR = 0.5     # 0.5s, 1s, 2s...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+def _shared_adapter() -> HTTPAdapter:
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            retry = Retry(
+                total=RETRIES,
+                connect=RETRIES,
+                read=RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                # La API de tikwm usa POST pero es de solo lectura
+                allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            _adapter = HTTPAdapter(
+                pool_connections=POOL_HOSTS,
+                pool_maxsize=POOL_PER_HOST,
+                # Sin bloquear: una respuesta en streaming sin cerrar no debe
+                # dejar a otros hilos esperando un slot del pool
+                pool_block=False,
+                max_retries=retry,
+            )
+        return _adapter
+
+
+def get_session() -> requests.Session:
+    """Session HTTP del hilo actual, con keep-alive y reintentos compartidos"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = _shared_adapter()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _local.session = session
+    return session
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from core.paths import app_data_dir
+
+
+# Portadas y miniaturas en disco, direccionadas por contenido: cada imagen se
+# guarda una vez como <sha256> aunque llegue por varias URLs, y un índice
+# SQLite asocia URL -> hash. Cuando el total supera el presupuesto se borran
+# las imágenes usadas hace más tiempo hasta quedar en EVICT_TARGET.
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+EVICT_TARGET = 0.9
+FETCH_TIMEOUT = 10
+
+
+class ImageCache:
+    """Caché de imágenes compartida por las vistas previas y el etiquetado ID3"""
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or app_data_dir("images")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest      TEXT PRIMARY KEY,
+                    size        INTEGER NOT NULL,
+                    last_access REAL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url    TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, url: str):
+        """Bytes de la imagen de url si está en caché, o None"""
+        if not url:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM urls WHERE url=?", (url,)).fetchone()
+        if row is None:
+            return None
+        digest = row[0]
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                data = f.read()
+        except OSError:
+            # El archivo se borró por fuera: olvidar la entrada
+            self._forget(digest)
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET last_access=? WHERE digest=?", (time.time(), digest))
+            self._conn.commit()
+        return data
+
+    def put(self, url: str, data: bytes) -> str:
+        """Guarda data para url y devuelve su hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)", (digest, len(data), time.time())
+            )
+            self._conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, digest))
+            self._conn.commit()
+        self._evict()
+        return digest
+
+    def fetch(self, url: str, session=None, timeout: int = FETCH_TIMEOUT):
+        """Imagen de url desde la caché o la red (se guarda si responde 200). None si falla"""
+        data = self.get(url)
+        if data is not None:
+            return data
+        data = _download(url, session, timeout)
+        if data:
+            try:
+                self.put(url, data)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ No se pudo guardar la imagen en caché: {e}")
+        return data
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict(self):
+        """Borra las imágenes menos usadas hasta volver al presupuesto"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET
+        with self._lock:
+            rows = self._conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall()
+        for digest, size in rows:
+            if total <= target:
+                break
+            self._forget(digest)
+            total -= size
+
+    def _forget(self, digest: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM urls WHERE digest=?", (digest,))
+            self._conn.execute("DELETE FROM blobs WHERE digest=?", (digest,))
+            self._conn.commit()
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+
+def _download(url, session, timeout):
+    if session is None:
+        from core.http import get_session
+        session = get_session()
+    try:
+        response = session.get(url, timeout=timeout)
+    except Exception:
+        return None
+    if response.status_code != 200 or not response.content:
+        return None
+    return response.content
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Caché de imágenes compartida del proceso"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ImageCache()
+        return _default_cache
+
+
+def fetch_image(url: str, session=None, timeout: int = FETCH_TIMEOUT):
+    """Atajo de get_image_cache().fetch(). Devuelve bytes o None"""
+    if not url:
+        return None
+    try:
+        cache = get_image_cache()
+    except (OSError, sqlite3.Error) as e:
+        # Sin caché utilizable se sigue bajando directo
+        print(f"⚠️ Caché de imágenes no disponible: {e}")
+        return _download(url, session, timeout)
+    return cache.fetch(url, session=session, timeout=timeout)
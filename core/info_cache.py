@@ -0,0 +1,183 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse, urlunparse
+
+from core.paths import app_data_dir
+
+
+# Caché de metadata compartida entre la vista previa y la descarga: la UI pide
+# get_video_info para mostrar la tarjeta y la descarga vuelve a necesitar lo
+# mismo segundos después. Cada entrada vence a DEFAULT_TTL o antes, si la info
+# trae URLs firmadas de CDN (TikTok, Instagram, googlevideo) que expiran primero.
+DEFAULT_TTL = 15 * 60
+MAX_ENTRIES = 256
+EXPIRY_MARGIN = 60          # Segundos de margen antes del vencimiento de una URL firmada
+
+# NOVAHUB_INFO_CACHE=disk guarda la caché al salir y la recarga al iniciar
+PERSIST_ENV_VAR = 'NOVAHUB_INFO_CACHE'
+
+# Respuestas de un CDN cuando la URL firmada ya no es válida
+EXPIRED_STATUSES = (403, 404, 410)
+
+# Parámetros con el vencimiento en segundos Unix (googlevideo, TikTok, S3/CloudFront)
+_EXPIRY_PARAMS = ('expire', 'expires', 'x-expires', 'Expires')
+
+
+def normalize_url(url: str) -> str:
+    """URL comparable: sin espacios, fragmento ni barra final, con esquema y dominio en minúsculas"""
+    parts = urlparse(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), path, '', parts.query, ''))
+
+
+def url_expiry(url):
+    """Momento (segundos Unix) en que vence una URL firmada de CDN, o None"""
+    if not isinstance(url, str) or '?' not in url:
+        return None
+    try:
+        query = parse_qs(urlparse(url).query)
+    except ValueError:
+        return None
+    for name in _EXPIRY_PARAMS:
+        values = query.get(name)
+        if values and values[0].isdigit():
+            return int(values[0])
+    # CDN de Instagram/Facebook: oe=<timestamp en hexadecimal>
+    values = query.get('oe')
+    if values:
+        try:
+            return int(values[0], 16)
+        except ValueError:
+            pass
+    return None
+
+
+def info_expiry(info):
+    """Vencimiento más cercano entre las URLs directas de un info dict, o None"""
+    if not isinstance(info, dict):
+        return None
+    urls = [info.get('download_url'), info.get('url')]
+    for field in ('formats', 'requested_formats', 'images'):
+        for item in info.get(field) or []:
+            if isinstance(item, dict):
+                urls.append(item.get('url'))
+    expiries = [expiry for expiry in map(url_expiry, urls) if expiry]
+    return min(expiries) if expiries else None
+
+
+class InfoCache:
+    """LRU acotada por cantidad de entradas y por tiempo de vida.
+
+    Las claves son tuplas (plataforma, extractor, id) o (plataforma, url
+    normalizada); los valores, dicts serializables a JSON. Es segura entre hilos.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = DEFAULT_TTL, persist_path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._entries = OrderedDict()  # key -> (vence, valor)
+        self._lock = threading.Lock()
+        if persist_path:
+            self._load()
+
+    def get(self, key):
+        """Valor vigente para key, o None (las entradas vencidas se descartan)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value, ttl: float = None):
+        """Guarda value; su vida se recorta al vencimiento de las URLs directas que contenga"""
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        url_expires = info_expiry(value)
+        if url_expires:
+            expires = min(expires, url_expires - EXPIRY_MARGIN)
+        if expires <= now:
+            return  # La URL ya está por vencer: no vale la pena guardarla
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def save(self):
+        """Escribe las entradas vigentes en persist_path (las no serializables se omiten)"""
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [(key, expires, value) for key, (expires, value) in self._entries.items() if expires > now]
+        data = []
+        for key, expires, value in entries:
+            try:
+                json.dumps(value)
+            except (TypeError, ValueError):
+                continue
+            data.append({'key': list(key), 'expires': expires, 'value': value})
+        tmp_path = self.persist_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de metadata: {e}")
+
+    def _load(self):
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for item in data if isinstance(data, list) else []:
+                try:
+                    key, expires, value = tuple(item['key']), float(item['expires']), item['value']
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if expires > now:
+                    self._entries[key] = (expires, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_info_cache() -> InfoCache:
+    """Caché compartida del proceso (persistida solo con NOVAHUB_INFO_CACHE=disk)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            persist_path = None
+            if os.environ.get(PERSIST_ENV_VAR, '').lower() == 'disk':
+                persist_path = os.path.join(app_data_dir(), "info_cache.json")
+            _cache = InfoCache(persist_path=persist_path)
+            if persist_path:
+                atexit.register(_cache.save)
+        return _cache
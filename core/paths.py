@@ -0,0 +1,19 @@
+import os
+
+
+def app_data_dir(*parts) -> str:
+    """Carpeta de datos persistentes de Nova Hub (archivo de descargas, cachés).
+
+    Se puede forzar con la variable de entorno NOVAHUB_HOME. Por defecto usa
+    %LOCALAPPDATA%/NovaHub en Windows y $XDG_DATA_HOME/novahub en Linux/macOS.
+    """
+    base = os.environ.get("NOVAHUB_HOME")
+    if not base:
+        if os.name == "nt":
+            base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "NovaHub")
+        else:
+            xdg = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+            base = os.path.join(xdg, "novahub")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
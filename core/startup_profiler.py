@@ -0,0 +1,227 @@
+import atexit
+import builtins
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Instrumentación del arranque. Se activa con NOVAHUB_PROFILE_STARTUP=1 (o una
+# ruta .json para el artefacto) o con `python main.py --profile-startup`.
+# Mide el tiempo de cada import (acumulado y propio, sin contar sub-imports),
+# fases con nombre (build() de cada vista) e hitos (ventana visible).
+# Al terminar el arranque imprime un reporte ordenado en stderr y guarda un JSON.
+ENV_VAR = 'NOVAHUB_PROFILE_STARTUP'
+BUDGET_ENV_VAR = 'NOVAHUB_STARTUP_BUDGET'   # Segundos hasta la primera vista lista
+CLI_FLAG = '--profile-startup'
+
+# Paquetes pesados que se resumen aparte en el reporte
+WATCHED_PACKAGES = ('PySide6', 'yt_dlp', 'instaloader', 'ytmusicapi', 'mutagen', 'qrcode', 'PIL', 'requests')
+REPORT_LIMIT = 25
+
+
+class StartupProfiler:
+    """Registra imports, fases e hitos desde que se crea"""
+
+    def __init__(self, json_path=None, budget=None):
+        self.started = time.perf_counter()
+        self.json_path = json_path
+        self.budget = budget
+        self.imports = {}     # módulo -> [acumulado, propio]
+        self.phases = []      # (nombre, segundos)
+        self.marks = {}       # hito -> segundos desde el inicio
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    # ------------------------------------------------------------ imports
+
+    def install(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        fullname = name
+        if level:
+            try:
+                fullname = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                pass
+        if fullname in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        # Pila por hilo: el tiempo de un sub-import se descuenta del propio del padre
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            with self._lock:
+                entry = self.imports.setdefault(fullname, [0.0, 0.0])
+                entry[0] += elapsed
+                entry[1] += elapsed - frame[0]
+
+    # ------------------------------------------------------ fases e hitos
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.started)
+
+    # ------------------------------------------------------------ reporte
+
+    def _package_totals(self):
+        totals = {}
+        for module, (_, own) in self.imports.items():
+            package = module.split('.')[0]
+            totals[package] = totals.get(package, 0.0) + own
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+            phases = sorted(self.phases, key=lambda item: item[1], reverse=True)
+            marks = dict(self.marks)
+        packages = self._package_totals()
+        ready = marks.get('first_view_ready')
+        return {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'marks': {name: round(seconds, 4) for name, seconds in marks.items()},
+            'budget': self.budget,
+            'over_budget': bool(self.budget and ready and ready > self.budget),
+            'phases': [{'name': name, 'seconds': round(seconds, 4)} for name, seconds in phases],
+            'packages': {
+                name: round(packages.get(name, 0.0), 4) for name in WATCHED_PACKAGES
+            },
+            'imports': [
+                {'module': module, 'cumulative': round(cumulative, 4), 'self': round(own, 4)}
+                for module, (cumulative, own) in imports
+            ],
+        }
+
+    def report(self, limit=REPORT_LIMIT) -> str:
+        data = self.to_dict()
+        lines = ["", "==== Perfil de arranque de Nova Hub ===="]
+        for name, seconds in sorted(data['marks'].items(), key=lambda item: item[1]):
+            lines.append(f"  {seconds:8.3f} s  {name}")
+        if data['budget']:
+            status = "EXCEDIDO" if data['over_budget'] else "OK"
+            lines.append(f"  Presupuesto: {data['budget']:.3f} s -> {status}")
+
+        lines.append("-- Fases --")
+        for phase in data['phases']:
+            lines.append(f"  {phase['seconds']:8.3f} s  {phase['name']}")
+
+        lines.append("-- Paquetes (tiempo propio sumado) --")
+        for name, seconds in sorted(data['packages'].items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {seconds:8.3f} s  {name}" + ("" if seconds else "  (no importado)"))
+
+        lines.append(f"-- Imports más costosos (acumulado / propio, top {limit}) --")
+        for entry in data['imports'][:limit]:
+            lines.append(f"  {entry['cumulative']:8.3f} s  {entry['self']:8.3f} s  {entry['module']}")
+        return "\n".join(lines)
+
+    def write_json(self):
+        path = self.json_path
+        if not path:
+            from core.paths import app_data_dir
+            path = os.path.join(app_data_dir('profiles'), time.strftime('startup-%Y%m%d-%H%M%S.json'))
+            self.json_path = path
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+_profiler = None
+
+
+def enable(argv=None):
+    """Activa el perfil si lo pide la variable de entorno o el flag. Devuelve el perfilador o None"""
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+
+    value = os.environ.get(ENV_VAR, '')
+    if argv is not None and CLI_FLAG in argv:
+        argv.remove(CLI_FLAG)
+        value = value or '1'
+    if not value or value == '0':
+        return None
+
+    try:
+        budget = float(os.environ.get(BUDGET_ENV_VAR, '') or 0) or None
+    except ValueError:
+        budget = None
+    json_path = value if value.lower().endswith('.json') else None
+
+    _profiler = StartupProfiler(json_path, budget)
+    _profiler.install()
+    # Al salir se reescribe el JSON con las vistas construidas después del arranque
+    atexit.register(_write_at_exit)
+    return _profiler
+
+
+def get_profiler():
+    return _profiler
+
+
+def phase(name):
+    """Context manager que mide una fase (no hace nada si el perfil está desactivado)"""
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.phase(name)
+
+
+def mark(name):
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def finish():
+    """Fin del arranque: imprime el reporte y guarda el JSON"""
+    if _profiler is None:
+        return
+    _profiler.mark('first_view_ready')
+    try:
+        path = _profiler.write_json()
+        print(_profiler.report(), file=sys.stderr)
+        print(f"  JSON: {path}", file=sys.stderr)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el perfil de arranque: {e}", file=sys.stderr)
+
+
+def _write_at_exit():
+    if _profiler is None or 'first_view_ready' not in _profiler.marks:
+        return
+    try:
+        _profiler.write_json()
+    except OSError:
+        pass
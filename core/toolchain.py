@@ -0,0 +1,127 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+
+# Ubicación de ffmpeg/ffprobe, resuelta una sola vez por proceso y sin depender
+# del directorio actual. Orden de búsqueda:
+#   1. NOVAHUB_FFMPEG (carpeta o ruta del ejecutable)
+#   2. ffmpeg/bin junto al ejecutable congelado (PyInstaller) o junto al proyecto,
+#      donde lo deja install_ffmpeg.py
+#   3. el PATH del sistema
+ENV_VAR = 'NOVAHUB_FFMPEG'
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_TIMEOUT = 10
+
+# Codificadores MP3 en orden de preferencia (libshine: fixed-point, sin lame)
+MP3_ENCODERS = ('libmp3lame', 'libshine')
+
+
+class Toolchain:
+    """ffmpeg/ffprobe encontrados, su versión y los codificadores que trae"""
+
+    def __init__(self, ffmpeg=None, ffprobe=None, location=None, version=None, encoders=frozenset()):
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        # Carpeta para 'ffmpeg_location' de yt-dlp. None si se encontró en el PATH
+        self.location = location
+        self.version = version
+        self.encoders = encoders
+
+    @property
+    def available(self) -> bool:
+        return self.ffmpeg is not None
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    @property
+    def mp3_encoder(self):
+        """Mejor codificador MP3 disponible, o None"""
+        for name in MP3_ENCODERS:
+            if self.has_encoder(name):
+                return name
+        return None
+
+    def describe(self) -> str:
+        if not self.available:
+            return "ffmpeg no encontrado (ejecuta python install_ffmpeg.py)"
+        return f"ffmpeg {self.version or '?'} en {self.ffmpeg} (MP3: {self.mp3_encoder or 'no disponible'})"
+
+
+def _exe(name: str) -> str:
+    return f"{name}.exe" if os.name == "nt" else name
+
+
+def _candidate_dirs():
+    dirs = []
+    override = os.environ.get(ENV_VAR)
+    if override:
+        dirs.append(override if os.path.isdir(override) else os.path.dirname(override))
+    if getattr(sys, 'frozen', False):
+        dirs.append(os.path.join(os.path.dirname(sys.executable), 'ffmpeg', 'bin'))
+        bundle = getattr(sys, '_MEIPASS', None)
+        if bundle:
+            dirs.append(os.path.join(bundle, 'ffmpeg', 'bin'))
+    dirs.append(os.path.join(PROJECT_DIR, 'ffmpeg', 'bin'))
+    return dirs
+
+
+def _run(cmd) -> str:
+    # En Windows evitar que el sondeo abra una consola
+    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    result = subprocess.run(
+        cmd, capture_output=True, text=True, errors='replace',
+        timeout=PROBE_TIMEOUT, creationflags=creationflags
+    )
+    return result.stdout
+
+
+def _probe(ffmpeg):
+    """(versión, codificadores) de un ejecutable de ffmpeg"""
+    version = None
+    encoders = set()
+    try:
+        match = re.search(r'ffmpeg version (\S+)', _run([ffmpeg, '-hide_banner', '-version']))
+        version = match.group(1) if match else None
+        # Líneas del tipo " A....D libmp3lame   libmp3lame MP3 (MPEG audio layer 3)"
+        for line in _run([ffmpeg, '-hide_banner', '-encoders']).splitlines():
+            match = re.match(r'\s*[VAS][\w.]{5}\s+(\S+)', line)
+            if match and match.group(1) != '=':
+                encoders.add(match.group(1))
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"⚠️ No se pudo sondear ffmpeg ({ffmpeg}): {e}")
+    return version, frozenset(encoders)
+
+
+def resolve() -> Toolchain:
+    """Busca y sondea ffmpeg/ffprobe (sin caché: usar get_toolchain)"""
+    for directory in _candidate_dirs():
+        ffmpeg = os.path.join(directory, _exe('ffmpeg'))
+        if os.path.isfile(ffmpeg):
+            ffprobe = os.path.join(directory, _exe('ffprobe'))
+            version, encoders = _probe(ffmpeg)
+            return Toolchain(ffmpeg, ffprobe if os.path.isfile(ffprobe) else shutil.which('ffprobe'),
+                             directory, version, encoders)
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return Toolchain(ffprobe=shutil.which('ffprobe'))
+    version, encoders = _probe(ffmpeg)
+    return Toolchain(ffmpeg, shutil.which('ffprobe'), None, version, encoders)
+
+
+_toolchain = None
+_toolchain_lock = threading.Lock()
+
+
+def get_toolchain(refresh: bool = False) -> Toolchain:
+    """Toolchain del proceso. refresh=True vuelve a buscar (p. ej. tras instalar ffmpeg)"""
+    global _toolchain
+    with _toolchain_lock:
+        if _toolchain is None or refresh:
+            _toolchain = resolve()
+        return _toolchain
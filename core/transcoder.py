@@ -0,0 +1,86 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.toolchain import get_toolchain
+
+
+# Etapa de CPU del pipeline: las descargas de red solo bajan el stream crudo y
+# la conversión a MP3 (+ etiquetado) se hace aquí, en un pool del tamaño de los
+# núcleos. El trabajo pesado corre en procesos hijos de ffmpeg, por lo que los
+# hilos del pool solo lanzan y esperan esos procesos.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool compartido de conversión, dimensionado a los núcleos disponibles"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                thread_name_prefix="transcoder"
+            )
+        return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """Encola un trabajo de CPU y devuelve su Future"""
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+def completed(result):
+    """Future ya resuelto (descargas omitidas o errores de la etapa de red)"""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _ffmpeg_binary(ffmpeg_location=None) -> str:
+    exe = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
+    if ffmpeg_location:
+        candidate = os.path.join(ffmpeg_location, exe)
+        if os.path.exists(candidate):
+            return candidate
+    return get_toolchain().ffmpeg or exe
+
+
+def transcode_to_mp3(src_path: str, dst_path: str, bitrate: str = "320",
+                     metadata: dict = None, ffmpeg_location: str = None,
+                     keep_source: bool = False):
+    """Convierte src_path a MP3 CBR con libmp3lame (o libshine si el ffmpeg no trae lame).
+
+    Escribe primero a un archivo temporal y lo renombra al terminar, así un
+    corte a mitad de conversión nunca deja un .mp3 incompleto con el nombre final.
+    Lanza subprocess.CalledProcessError / OSError si ffmpeg falla.
+    """
+    tmp_path = dst_path + ".transcoding"
+    cmd = [
+        _ffmpeg_binary(ffmpeg_location), "-y", "-hide_banner", "-loglevel", "error",
+        "-i", src_path, "-vn", "-codec:a", get_toolchain().mp3_encoder or "libmp3lame", "-b:a", f"{bitrate}k",
+    ]
+    for key, value in (metadata or {}).items():
+        if value:
+            cmd += ["-metadata", f"{key}={value}"]
+    cmd += ["-f", "mp3", tmp_path]
+
+    # En Windows evitar que cada conversión abra una consola
+    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, creationflags=creationflags)
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    if not keep_source and os.path.abspath(src_path) != os.path.abspath(dst_path):
+        try:
+            os.remove(src_path)
+        except OSError:
+            pass
+    return dst_path
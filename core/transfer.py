@@ -0,0 +1,347 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+from core.http import get_session
+
+
+# Motor de descarga para URLs directas (CDN de TikTok, Instagram, ...).
+# Si el servidor anuncia Accept-Ranges y el archivo es grande, se divide en
+# rangos de bytes descargados en paralelo sobre un archivo preasignado; si no,
+# se usa un único stream.
+#
+# Los datos se escriben en "<archivo>.part" y el avance (tamaño, validador
+# ETag/Last-Modified y bytes escritos por rango) se guarda en "<archivo>.part.json".
+# Si la descarga se corta, el siguiente intento continúa con Range + If-Range.
+DEFAULT_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 2 * 1024 * 1024   # Por debajo de esto no vale la pena segmentar
+CHECKPOINT_BYTES = 1024 * 1024       # Cada cuánto se persiste el avance de un rango
+
+# Lectura adaptativa: el tamaño de bloque se duplica/reduce a la mitad según
+# cuánto tarda cada lectura, buscando ~READ_TARGET segundos por iteración.
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+READ_TARGET = 0.1
+WRITE_BUFFER = 1024 * 1024
+PROGRESS_INTERVAL = 0.1              # Máximo ~10 callbacks de progreso por segundo
+
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+
+
+class TransferError(Exception):
+    """Fallo de red o de integridad en una descarga directa"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status  # Código HTTP si el servidor rechazó la petición
+
+
+class _RangesUnsupported(Exception):
+    pass
+
+
+def _probe(session, url, timeout):
+    """HEAD para conocer tamaño, soporte de rangos, validador y URL final tras redirecciones"""
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+    except Exception:
+        return url, 0, False, None
+    if response.status_code != 200:
+        return url, 0, False, None
+    size = int(response.headers.get('content-length', 0) or 0)
+    ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    encoded = response.headers.get('content-encoding', 'identity').lower() != 'identity'
+
+    # If-Range solo admite ETags fuertes; si no hay, usar Last-Modified
+    etag = response.headers.get('etag')
+    validator = etag if etag and not etag.startswith('W/') else response.headers.get('last-modified')
+    return response.url, size, ranges and not encoded, validator
+
+
+class _PartState:
+    """Avance persistido de una descarga: [inicio, fin, escritos] por rango"""
+
+    def __init__(self, filepath, size, validator, ranges):
+        self.state_path = filepath + STATE_SUFFIX
+        self.size = size
+        self.validator = validator
+        self.ranges = ranges
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, filepath, size, validator):
+        """Estado previo reutilizable, o None si no existe o el recurso cambió"""
+        try:
+            with open(filepath + STATE_SUFFIX, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not validator or data.get('validator') != validator or data.get('size') != size
+                or not os.path.exists(filepath + PART_SUFFIX)):
+            return None
+        return cls(filepath, size, validator, data.get('ranges') or [])
+
+    @property
+    def segmented(self):
+        return len(self.ranges) > 1
+
+    @classmethod
+    def create(cls, filepath, size, validator, segments):
+        step = size // segments
+        ranges = [
+            [i * step, size - 1 if i == segments - 1 else (i + 1) * step - 1, 0]
+            for i in range(segments)
+        ]
+        return cls(filepath, size, validator, ranges)
+
+    def done(self):
+        with self._lock:
+            return sum(written for _, _, written in self.ranges)
+
+    def missing(self) -> int:
+        """Bytes que faltan por escribir sumando todos los rangos"""
+        with self._lock:
+            return sum(end - start + 1 - written for start, end, written in self.ranges)
+
+    def update(self, index, written):
+        with self._lock:
+            self.ranges[index][2] = written
+
+    def save(self):
+        if not self.validator:
+            return  # Sin validador no es seguro continuar después
+        with self._lock:
+            data = {'size': self.size, 'validator': self.validator, 'ranges': self.ranges}
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+    def discard(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+
+class _Progress:
+    """Acumula bytes de varios hilos y reporta la fracción total (con throttling)"""
+
+    def __init__(self, total, callback, done=0):
+        self.total = total
+        self.callback = callback
+        self.done = done
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done += count
+            if not self.callback or self.total <= 0:
+                return
+            now = time.monotonic()
+            if now - self._last_report < PROGRESS_INTERVAL and self.done < self.total:
+                return
+            self._last_report = now
+            self.callback(min(self.done / self.total, 1.0))
+
+
+def stream_response(response, f, on_bytes=None, cancelled=None) -> int:
+    """Copia el cuerpo de una respuesta requests (stream=True) al archivo f.
+
+    Sin compresión de transporte lee con readinto sobre un bytearray reutilizable
+    y ajusta el tamaño de bloque al throughput observado; con compresión usa
+    iter_content (los bytes deben decodificarse). on_bytes(n) se llama por bloque.
+    Devuelve los bytes escritos.
+    """
+    written = 0
+    encoded = response.headers.get('content-encoding', 'identity').lower() != 'identity'
+    if encoded:
+        for chunk in response.iter_content(chunk_size=MIN_CHUNK_SIZE):
+            if cancelled is not None and cancelled.is_set():
+                break
+            if chunk:
+                f.write(chunk)
+                written += len(chunk)
+                if on_bytes:
+                    on_bytes(len(chunk))
+        return written
+
+    raw = response.raw
+    buffer = bytearray(MAX_CHUNK_SIZE)
+    view = memoryview(buffer)
+    chunk_size = MIN_CHUNK_SIZE
+    while cancelled is None or not cancelled.is_set():
+        started = time.monotonic()
+        try:
+            count = raw.readinto(view[:chunk_size])
+        except (OSError, Urllib3Error) as e:
+            raise TransferError(f"Conexión interrumpida tras {written} bytes: {e}") from e
+        if not count:
+            break
+        f.write(view[:count])
+        written += count
+        if on_bytes:
+            on_bytes(count)
+
+        elapsed = time.monotonic() - started
+        if count == chunk_size and elapsed < READ_TARGET / 2:
+            chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+        elif elapsed > READ_TARGET * 2:
+            chunk_size = max(chunk_size // 2, MIN_CHUNK_SIZE)
+    return written
+
+
+def download_file(url: str, filepath: str, progress_callback=None, session=None,
+                  segments: int = DEFAULT_SEGMENTS, timeout: int = 30) -> int:
+    """Descarga url a filepath y devuelve el tamaño final en bytes.
+
+    progress_callback recibe la fracción completada (0.0-1.0).
+    Lanza TransferError si la respuesta no es válida, si el tamaño final no
+    coincide con content-length o, en la descarga por rangos (donde el .part
+    está preasignado y siempre mide lo esperado), si algún rango quedó
+    incompleto. En esos casos el .part queda en disco para continuar en el
+    próximo intento.
+    """
+    final_url, size, ranges, validator = _probe(session or get_session(), url, timeout)
+    part_path = filepath + PART_SUFFIX
+
+    if ranges and size:
+        state = _PartState.load(filepath, size, validator)
+        if state is not None and not state.segmented:
+            # Avance de un stream único: se continúa por el mismo camino
+            return _download_single(final_url, filepath, size, ranges, validator,
+                                    progress_callback, session, timeout, resume=True)
+        if state is None and segments > 1 and size >= 2 * MIN_SEGMENT_SIZE:
+            state = _PartState.create(filepath, size, validator, min(segments, size // MIN_SEGMENT_SIZE))
+        if state is not None:
+            try:
+                _download_ranges(final_url, part_path, state, progress_callback, session, timeout)
+                return _finish(part_path, filepath, size, state)
+            except _RangesUnsupported:
+                state.discard()  # El servidor ignoró el Range: caer al stream único
+
+    return _download_single(final_url, filepath, size, ranges, validator, progress_callback, session, timeout)
+
+
+def _finish(part_path, filepath, expected, state=None):
+    if state is not None and state.segmented:
+        # El .part está preasignado: su tamaño no dice nada, hay que mirar los rangos
+        missing = state.missing()
+        if missing:
+            raise TransferError(f"Descarga incompleta: faltan {missing} de {expected} bytes")
+    actual = os.path.getsize(part_path)
+    if expected and actual != expected:
+        raise TransferError(f"Descarga incompleta: {actual} de {expected} bytes")
+    os.replace(part_path, filepath)
+    if state is not None:
+        state.discard()
+    return actual
+
+
+def _download_single(url, filepath, size, ranges, validator, progress_callback, session, timeout,
+                     resume=False):
+    session = session or get_session()
+    part_path = filepath + PART_SUFFIX
+
+    # Un stream único escribe en orden: el tamaño del .part es el offset a continuar.
+    # resume solo es True si el validador guardado coincide con el actual.
+    offset = 0
+    headers = {}
+    if resume and ranges and size and os.path.exists(part_path):
+        offset = os.path.getsize(part_path)
+        if 0 < offset < size:
+            headers = {'Range': f'bytes={offset}-', 'If-Range': validator}
+        else:
+            offset = 0
+    state = _PartState(filepath, size, validator, [[0, size - 1, 0]]) if size else None
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 206 and offset:
+            mode = 'ab'
+        elif response.status_code == 200:
+            offset, mode = 0, 'wb'  # Recurso cambiado o sin soporte de rangos: desde cero
+        else:
+            raise TransferError(f"Status {response.status_code}", response.status_code)
+
+        total_size = size or int(response.headers.get('content-length', 0) or 0)
+        encoded = response.headers.get('content-encoding', 'identity').lower() != 'identity'
+        progress = _Progress(total_size, progress_callback, done=offset)
+        if state is not None:
+            state.save()
+
+        with open(part_path, mode, buffering=WRITE_BUFFER) as f:
+            stream_response(response, f, progress.add)
+
+    # Con compresión de transporte content-length no corresponde a los bytes decodificados
+    return _finish(part_path, filepath, 0 if encoded else total_size, state)
+
+
+def _download_ranges(url, part_path, state, progress_callback, session, timeout):
+    # Preasignar el archivo completo para que cada rango escriba en su offset
+    if not os.path.exists(part_path) or os.path.getsize(part_path) != state.size:
+        for item in state.ranges:
+            item[2] = 0  # El .part no corresponde al estado: empezar de cero
+        with open(part_path, 'wb') as f:
+            f.truncate(state.size)
+    state.save()
+
+    progress = _Progress(state.size, progress_callback, done=state.done())
+    cancelled = threading.Event()
+
+    def fetch(index):
+        start, end, written = state.ranges[index]
+        expected = end - start + 1
+        if written >= expected:
+            return
+        # Sin session inyectada, cada hilo usa la suya sobre el pool compartido
+        segment_session = session or get_session()
+        headers = {'Range': f'bytes={start + written}-{end}'}
+        if state.validator:
+            headers['If-Range'] = state.validator
+        with segment_session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 200:
+                raise _RangesUnsupported()
+            if response.status_code != 206:
+                raise TransferError(f"Status {response.status_code} en rango {start}-{end}", response.status_code)
+
+            checkpoint = written
+            with open(part_path, 'r+b', buffering=WRITE_BUFFER) as f:
+                f.seek(start + written)
+
+                def on_bytes(count):
+                    nonlocal written, checkpoint
+                    written += count
+                    progress.add(count)
+                    if written - checkpoint >= CHECKPOINT_BYTES:
+                        # Persistir solo lo que ya está escrito en disco
+                        f.flush()
+                        state.update(index, written)
+                        state.save()
+                        checkpoint = written
+
+                try:
+                    stream_response(response, f, on_bytes, cancelled)
+                finally:
+                    f.flush()
+                    state.update(index, written)
+
+        if not cancelled.is_set() and written != expected:
+            raise TransferError(f"Rango {start}-{end} incompleto: {written} de {expected} bytes")
+
+    with ThreadPoolExecutor(max_workers=len(state.ranges), thread_name_prefix="segment") as pool:
+        futures = [pool.submit(fetch, index) for index in range(len(state.ranges))]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            cancelled.set()
+            raise
+        finally:
+            state.save()
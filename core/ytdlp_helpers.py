@@ -0,0 +1,93 @@
+import copy
+import os
+
+from core.info_cache import normalize_url
+
+
+def literal_outtmpl(output_path: str, title: str) -> str:
+    """Plantilla de salida de yt-dlp con un título literal (escapa '%')"""
+    return os.path.join(output_path, f"{title.replace('%', '%%')}.%(ext)s")
+
+
+def set_outtmpl(ydl, template: str):
+    """Cambia la plantilla de salida de una instancia YoutubeDL ya construida.
+
+    yt-dlp lee params['outtmpl'] al preparar cada nombre de archivo, así que
+    se puede fijar después de extraer la metadata y antes de descargar.
+    """
+    outtmpl = ydl.params.get('outtmpl')
+    if not isinstance(outtmpl, dict):
+        outtmpl = {'default': outtmpl} if outtmpl else {}
+        ydl.params['outtmpl'] = outtmpl
+    outtmpl['default'] = template
+
+
+def download_extracted(ydl, info: dict, template: str):
+    """Descarga un info dict ya extraído sin volver a resolver la URL.
+
+    Reutiliza el resultado de extract_info(download=False) mediante
+    process_ie_result, de modo que cada video se extrae una sola vez.
+    """
+    set_outtmpl(ydl, template)
+    return ydl.process_ie_result(info, download=True)
+
+
+def extract_cached(downloader, ydl, url: str) -> dict:
+    """extract_info(download=False) pasando por la caché de info del descargador.
+
+    La vista previa y la descarga de una misma URL comparten así una sola
+    extracción. Se guarda el dict sanitizado (el mismo formato que
+    --load-info-json acepta) y se devuelve una copia propia, porque
+    process_ie_result la modifica al descargar.
+    """
+    info = downloader.cached_info(url, lambda: ydl.sanitize_info(ydl.extract_info(url, download=False)))
+    return copy.deepcopy(info)
+
+
+def downloaded_filepath(info: dict):
+    """Ruta del archivo que yt-dlp dejó en disco para un info dict ya procesado"""
+    for download in info.get('requested_downloads') or []:
+        if download.get('filepath'):
+            return download['filepath']
+    return info.get('filepath') or info.get('_filename')
+
+
+_extractor_classes = None
+
+
+def url_archive_key(url: str):
+    """(extractor, id) de una URL sin tocar la red.
+
+    Mismo criterio que --download-archive de yt-dlp: el primer extractor
+    específico que acepta la URL y el id que su patrón captura. Devuelve None
+    si solo la reconoce el extractor genérico.
+    """
+    global _extractor_classes
+    if _extractor_classes is None:
+        from yt_dlp.extractor import gen_extractor_classes
+        _extractor_classes = [ie for ie in gen_extractor_classes() if ie.ie_key() != 'Generic']
+
+    url = url.strip()
+    for ie in _extractor_classes:
+        if ie.suitable(url):
+            temp_id = ie.get_temp_id(url)
+            return (ie.ie_key().lower(), str(temp_id)) if temp_id else None
+    return None
+
+
+def info_archive_key(info: dict):
+    """(extractor, id) de un info dict ya extraído.
+
+    El extractor genérico usa como id el nombre base de la URL ('video',
+    'index'...), que se repite entre sitios sin relación; sus entradas se
+    identifican por la página normalizada más ese id.
+    """
+    extractor = info.get('extractor_key') or info.get('ie_key')
+    if not extractor or not info.get('id'):
+        return None
+    if extractor == 'Generic':
+        page = info.get('webpage_url') or info.get('original_url')
+        if not page:
+            return None
+        return 'generic', f"{normalize_url(page)}#{info['id']}"
+    return extractor.lower(), str(info['id'])
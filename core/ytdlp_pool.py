@@ -0,0 +1,179 @@
+import atexit
+import copy
+import threading
+from contextlib import contextmanager
+
+from yt_dlp import YoutubeDL
+
+from core.toolchain import get_toolchain
+from core.ytdlp_helpers import set_outtmpl
+
+
+# Instancias YoutubeDL de larga vida, agrupadas por perfil de opciones.
+# Construir un YoutubeDL inicializa los extractores, el cookie jar y la pila
+# de handlers HTTP; reutilizarlo conserva todo eso y las conexiones keep-alive.
+# Una instancia no es segura para dos hilos a la vez, así que se presta en
+# exclusiva (lease) y cada trabajo fija su propio outtmpl y progress hooks.
+POOL_SIZE = 4   # Instancias ociosas conservadas por perfil (≈ concurrencia del scheduler)
+
+MP4_FORMAT = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+
+
+class QuietLogger:
+    """Silencia la salida cruda de yt-dlp (los errores llegan como excepciones)"""
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+PROFILES = {
+    # Solo metadata (vistas previas)
+    'info': {},
+    # Stream de audio crudo; la conversión a MP3 la hace core.transcoder
+    'audio': {
+        'format': 'bestaudio/best',
+        'noplaylist': True,
+        'continuedl': True,  # Retomar los .part de intentos anteriores
+    },
+    # Listado de playlists/canales: entradas sin resolver, páginas bajo demanda
+    'flat': {
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+    },
+    # Video MP4 con audio (fusiona DASH con ffmpeg)
+    'mp4': {
+        'format': MP4_FORMAT,
+        'merge_output_format': 'mp4',
+        'noplaylist': True,
+        'continuedl': True,
+    },
+}
+
+
+def profile_options(profile: str) -> dict:
+    """Opciones completas de YoutubeDL para un perfil"""
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de yt-dlp desconocido: {profile}")
+    options = {
+        'quiet': True,
+        'no_warnings': True,
+        'logger': QuietLogger(),
+        **PROFILES[profile],
+    }
+    ffmpeg_location = get_toolchain().location
+    if ffmpeg_location and profile not in ('info', 'flat'):
+        options['ffmpeg_location'] = ffmpeg_location
+    return options
+
+
+class _PooledYDL:
+    """Un YoutubeDL del pool con un único progress hook que reenvía a los del trabajo actual"""
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.hooks = ()
+        options = profile_options(profile)
+        options['progress_hooks'] = [self._dispatch]
+        self.ydl = YoutubeDL(options)
+        self._default_outtmpl = copy.deepcopy(self.ydl.params.get('outtmpl'))
+
+    def _dispatch(self, d):
+        for hook in self.hooks:
+            hook(d)
+
+    def begin(self, outtmpl=None, progress_hooks=()):
+        self.hooks = tuple(progress_hooks)
+        if outtmpl:
+            set_outtmpl(self.ydl, outtmpl)
+
+    def end(self):
+        """Deja la instancia como recién construida para el próximo trabajo"""
+        self.hooks = ()
+        if self._default_outtmpl is None:
+            self.ydl.params.pop('outtmpl', None)
+        else:
+            self.ydl.params['outtmpl'] = copy.deepcopy(self._default_outtmpl)
+
+    def close(self):
+        try:
+            self.ydl.close()
+        except Exception:
+            pass
+
+
+class YdlPool:
+    """Pool de YoutubeDL por perfil, compartido entre hilos de descarga"""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = size
+        self._idle = {}  # perfil -> [_PooledYDL]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self, profile: str, outtmpl: str = None, progress_hooks=()):
+        """Presta un YoutubeDL del perfil en exclusiva mientras dura el bloque with.
+
+        Si el trabajo termina con una excepción la instancia se descarta en vez
+        de volver al pool, por si quedó en un estado inconsistente.
+        """
+        slot = self._acquire(profile)
+        slot.begin(outtmpl, progress_hooks)
+        try:
+            yield slot.ydl
+        except BaseException:
+            slot.close()
+            raise
+        slot.end()
+        self._release(slot)
+
+    def _acquire(self, profile: str) -> _PooledYDL:
+        with self._lock:
+            idle = self._idle.get(profile)
+            if idle:
+                return idle.pop()
+        # Construir fuera del lock: es la parte lenta
+        return _PooledYDL(profile)
+
+    def _release(self, slot: _PooledYDL):
+        with self._lock:
+            idle = self._idle.setdefault(slot.profile, [])
+            if len(idle) < self.size:
+                idle.append(slot)
+                return
+        slot.close()
+
+    def close(self):
+        """Cierra las instancias ociosas (guarda cookies y libera conexiones)"""
+        with self._lock:
+            slots = [slot for idle in self._idle.values() for slot in idle]
+            self._idle.clear()
+        for slot in slots:
+            slot.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ydl_pool() -> YdlPool:
+    """Pool de YoutubeDL compartido del proceso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = YdlPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def lease(profile: str, outtmpl: str = None, progress_hooks=()):
+    """Atajo de get_ydl_pool().lease()"""
+    return get_ydl_pool().lease(profile, outtmpl, progress_hooks)
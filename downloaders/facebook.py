@@ -1,20 +1,6 @@
-import os
-from yt_dlp import YoutubeDL
 from core.base_downloader import Downloader
-
-
-class YTDLPLogger:
-    def debug(self, msg):
-        pass
-
-    def info(self, msg):
-        pass
-
-    def warning(self, msg):
-        pass
-
-    def error(self, msg):
-        pass
+from core.ytdlp_pool import lease
+from core.ytdlp_helpers import download_extracted, downloaded_filepath, extract_cached, literal_outtmpl, url_archive_key, info_archive_key
 
 
 def _progress_hook(d, callback=None, title_callback=None):
@@ -48,14 +34,8 @@ class FacebookDownloader(Downloader):
         url = url.strip()
         
         try:
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'logger': YTDLPLogger(),
-            }
-
-            with YoutubeDL(ydl_opts_info) as ydl:
-                info = ydl.extract_info(url, download=False)
+            with lease('info') as ydl:
+                info = extract_cached(self, ydl, url)
                 
                 title = info.get('title', 'Video de Facebook')
                 author = info.get('uploader', 'Usuario de Facebook')
@@ -67,9 +47,8 @@ class FacebookDownloader(Downloader):
                 # yt-dlp casi siempre devuelve None para filesize de Facebook, sacamos el peso de los headers del server original
                 filesize = info.get('filesize') or info.get('filesize_approx') or 0
                 if filesize == 0 and info.get('url'):
-                    import requests
                     try:
-                        head_res = requests.head(info.get('url'), timeout=5)
+                        head_res = self.http.head(info.get('url'), timeout=5)
                         filesize = int(head_res.headers.get('content-length', 0))
                     except:
                         pass
@@ -94,21 +73,26 @@ class FacebookDownloader(Downloader):
             print(f"✖ Error obteniendo info de Facebook: {e}")
             return None
 
+    def archive_key(self, url: str):
+        return url_archive_key(url)
+
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
         """Descarga el video de Facebook usando yt-dlp.
            (Nota: El método se llama download_audio por herencia obligada de Downloader actual,
             pero esto descarga Video MP4).
         """
-        try:
-            # Primero extraer el título sin descargar
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'logger': YTDLPLogger(),
-            }
+        # Consultar el archivo de descargas antes de tocar la red
+        archived_title = self.check_archive(url)
+        if archived_title:
+            return True, archived_title
 
-            with YoutubeDL(ydl_opts_info) as ydl:
-                info = ydl.extract_info(url, download=False)
+        try:
+            # Perfil 'mp4' del pool: prioriza buena calidad y audio asegurado
+            # (Facebook suele separar audio/video con DASH y ffmpeg los fusiona)
+            hooks = [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)]
+            with lease('mp4', progress_hooks=hooks) as ydl:
+                # Primero extraer el título sin descargar (una sola extracción por video)
+                info = extract_cached(self, ydl, url)
                 title = info.get('title', 'Video_Facebook')
                 import re
                 
@@ -125,34 +109,22 @@ class FacebookDownloader(Downloader):
                     import time
                     safe_title = f"FacebookVideo_{int(time.time())}"
 
-            # Notificar título
-            if title_callback:
-                title_callback(safe_title)
+                key = info_archive_key(info)
+                archived_title = self.check_archive(key=key)
+                if archived_title:
+                    return True, archived_title
 
-            # Opciones de descarga para generar MP4 directamente 
-            # Prioriza buena calidad y audio asegurado (Facebook suele separar audio/video con DASH)
-            ydl_opts = {
-                'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                'outtmpl': os.path.join(output_path, f'{safe_title}.%(ext)s'),
-                'merge_output_format': 'mp4',
-                'noplaylist': True,
-                'progress_hooks': [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)],
-                'logger': YTDLPLogger(),
-                'no_warnings': True,
-                'quiet': True,
-                'overwrites': True,
-            }
-            
-            # Reintegrar ffmpeg_location si existe para fusionar formatos
-            ffmpeg_local_path = os.path.join(os.getcwd(), 'ffmpeg', 'bin')
-            if os.path.exists(ffmpeg_local_path):
-                ydl_opts['ffmpeg_location'] = ffmpeg_local_path
+                # Notificar título
+                if title_callback:
+                    title_callback(safe_title)
 
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(url, download=True)
+                info = download_extracted(ydl, info, literal_outtmpl(output_path, safe_title))
+                self.record_archive(key, safe_title, downloaded_filepath(info))
                 print(f"✓ Descarga exitosa: {safe_title}.mp4")
                 return True, safe_title
             
         except Exception as e:
             print(f"✖ Error fatal procesando descarga en Facebook {url}: {e}")
+            # Formatos vencidos o extracción inválida: el próximo intento vuelve a extraer
+            self.invalidate_info(url)
             return False, ''
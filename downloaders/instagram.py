@@ -1,9 +1,10 @@
 import os
-import requests
 import instaloader
 import time
 
 from core.base_downloader import Downloader
+from core import transfer
+from core.info_cache import EXPIRED_STATUSES
 
 class InstagramDownloader(Downloader):
     """Descargador de contenido de Instagram usando instaloader y requests para la descarga final"""
@@ -42,8 +43,11 @@ class InstagramDownloader(Downloader):
                 
         return None
 
-    def get_video_info(self, url: str):
-        """Extrae información del video de Instagram sin descargar"""
+    def get_video_info(self, url: str, refresh: bool = False):
+        """Extrae información del video de Instagram sin descargar (cacheada hasta que vence su URL directa)"""
+        return self.cached_info(url, lambda: self._fetch_video_info(url), refresh=refresh)
+
+    def _fetch_video_info(self, url: str):
         shortcode = self._extract_shortcode(url)
         if not shortcode:
             print("✖ No se pudo extraer el shortcode de la URL")
@@ -79,7 +83,7 @@ class InstagramDownloader(Downloader):
             filesize = 0
             if download_url:
                 try:
-                    head_res = requests.head(download_url, timeout=5)
+                    head_res = self.http.head(download_url, timeout=5)
                     filesize = int(head_res.headers.get('content-length', 0))
                 except:
                     pass
@@ -103,8 +107,11 @@ class InstagramDownloader(Downloader):
             print(f"✖ Error obteniendo info de Instagram: {e}")
             return None
 
-    def get_images_info(self, url: str):
+    def get_images_info(self, url: str, refresh: bool = False):
         """Extrae la información de todas las imágenes de un post o carrusel."""
+        return self.cached_info(url, lambda: self._fetch_images_info(url), kind='images', refresh=refresh)
+
+    def _fetch_images_info(self, url: str):
         shortcode = self._extract_shortcode(url)
         if not shortcode:
             print("✖ No se pudo extraer el shortcode de la URL")
@@ -142,12 +149,22 @@ class InstagramDownloader(Downloader):
             print(f"✖ Error obteniendo imágenes de Instagram: {e}")
             return None
 
+    def archive_key(self, url: str):
+        shortcode = self._extract_shortcode(url)
+        return ('instagram', shortcode) if shortcode else None
+
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
         """Descarga el video de Instagram.
            (Nota: El método se llama download_audio por herencia obligada de Downloader actual,
             pero esto descarga Video MP4).
         """
         try:
+            # Consultar el archivo de descargas antes de tocar la red
+            key = self.archive_key(url)
+            archived_title = self.check_archive(key=key)
+            if archived_title:
+                return True, archived_title
+
             info = self.get_video_info(url)
             
             if not info or not info.get('download_url'):
@@ -166,35 +183,34 @@ class InstagramDownloader(Downloader):
             if progress_callback:
                 progress_callback(0.1)
 
-            # Descarga real usando requests para poder mostrar el chunk_callback de progreso
-            response = requests.get(download_url, stream=True, timeout=30)
-            
-            if response.status_code != 200:
-                print(f"✖ Error al descargar (Requests): Status {response.status_code}")
-                return False, ''
-
-            total_size = int(response.headers.get('content-length', 0))
-            
             # Nombrar archivo con extensión .mp4
             filename = f"{author}_{shortcode}.mp4"
             filepath = os.path.join(output_path, filename)
             
-            downloaded = 0
-            chunk_size = 8192
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if progress_callback and total_size > 0:
-                            progress = downloaded / total_size
-                            progress_callback(progress)
+            # Descarga real por HTTP (rangos en paralelo si el CDN lo permite)
+            try:
+                try:
+                    transfer.download_file(
+                        download_url, filepath, progress_callback, session=self._session
+                    )
+                except transfer.TransferError as e:
+                    if e.status not in EXPIRED_STATUSES:
+                        raise
+                    # La URL firmada de la caché venció: volver a resolver el post una vez
+                    info = self.get_video_info(url, refresh=True)
+                    if not info or not info.get('download_url'):
+                        raise
+                    transfer.download_file(
+                        info['download_url'], filepath, progress_callback, session=self._session
+                    )
+            except transfer.TransferError as e:
+                print(f"✖ Error al descargar (Requests): {e}")
+                return False, ''
                             
             if progress_callback:
                 progress_callback(1.0)
                 
+            self.record_archive(key, title, filepath)
             print(f"✓ Descarga exitosa: {filename}")
             return True, title
             
@@ -1,18 +1,46 @@
+import csv
 import os
-import requests
 import re
 import string
-from yt_dlp import YoutubeDL
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from difflib import SequenceMatcher
 from core.base_downloader import Downloader
+from core.http import get_session
+from core.toolchain import get_toolchain
+from core import transcoder
+from core.image_cache import fetch_image
+from core.ytdlp_helpers import downloaded_filepath
+from core.ytdlp_pool import lease
 from ytmusicapi import YTMusic
 from mutagen.id3 import ID3, TIT2, TPE1, TALB, APIC
 from mutagen.mp3 import MP3
 
-class SpotifyLogger:
-    def debug(self, msg): pass
-    def info(self, msg): pass
-    def warning(self, msg): pass
-    def error(self, msg): pass
+# Importación masiva: búsquedas en YT Music simultáneas y umbral de aceptación
+MATCH_WORKERS = 8
+MATCH_THRESHOLD = 0.7
+# Pesos del puntaje de coincidencia (título, artista, duración). El título
+# solo suma 0.5: sin artista ni duración que lo respalden no llega al umbral
+MATCH_WEIGHTS = (0.5, 0.3, 0.2)
+# Con ambos artistas conocidos, por debajo de esta similitud se descarta el resultado
+MIN_ARTIST_SIMILARITY = 0.6
+# Diferencia de duración tolerada sin penalizar / a partir de la cual puntúa 0
+DURATION_TOLERANCE_MS = 3000
+DURATION_LIMIT_MS = 30000
+
+# Columnas aceptadas en el CSV (exportaciones de Spotify tipo Exportify o genéricas)
+_CSV_COLUMNS = {
+    'title': ('track name', 'title', 'track', 'name', 'canción', 'cancion'),
+    'artist': ('artist name(s)', 'artist names', 'artist', 'artists', 'artista'),
+    'album': ('album name', 'album', 'álbum'),
+    'duration_ms': ('duration (ms)', 'duration_ms', 'duration', 'duración', 'duracion'),
+}
+# Resultado de una búsqueda que no llegó a hacerse por cancelación
+_SKIPPED = object()
+# IDs de YT Music: playlists (PL..., OLAK5uy_... de álbumes, VL...) y álbumes (MPREb_...)
+_YTM_ID = re.compile(r'^(?:PL|OLAK5uy_|VL|RDCLAK|MPREb_)[\w-]+$')
+
 
 def clean_filename(name):
     """Limpia el nombre de la canción para que sea un ID seguro en Windows"""
@@ -20,6 +48,152 @@ def clean_filename(name):
     cleaned = ''.join(c for c in name if c in valid_chars)
     return re.sub(r'\s+', ' ', cleaned).strip()
 
+
+def parse_duration(value) -> int:
+    """Duración en ms desde 'm:ss', 'h:mm:ss' o un número de ms. 0 si no se entiende"""
+    if value is None:
+        return 0
+    text = str(value).strip()
+    try:
+        if ':' in text:
+            seconds = 0
+            for part in text.split(':'):
+                seconds = seconds * 60 + int(part)
+            return seconds * 1000
+        return int(float(text))
+    except ValueError:
+        return 0
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas, sin acentos ni puntuación, para comparar títulos y artistas"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^\w]+', ' ', text).strip()
+
+
+def _strip_extras(title: str) -> str:
+    """Título sin paréntesis/corchetes ni ' - Remastered...' (versiones, feat.)"""
+    title = re.sub(r'[\(\[][^\)\]]*[\)\]]', ' ', title or '')
+    return title.split(' - ')[0]
+
+
+def _similarity(a: str, b: str) -> float:
+    a, b = _normalize(a), _normalize(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _split_artists(text: str):
+    parts = re.split(r',|;|&| feat\.? | ft\.? | x ', text or '', flags=re.IGNORECASE)
+    return [p for p in (part.strip() for part in parts) if p]
+
+
+def score_match(wanted: dict, candidate: dict) -> float:
+    """Puntaje 0-1 de un resultado de YT Music frente a la pista buscada.
+
+    Combina la similitud del título (con y sin versiones entre paréntesis),
+    la del artista principal contra cualquiera de los del resultado y la
+    cercanía de duration_ms. Un artista o una duración desconocidos no suman,
+    así que un título igual por sí solo no alcanza MATCH_THRESHOLD; un
+    artista conocido y distinto descarta el resultado (puntaje 0).
+    """
+    title = max(
+        _similarity(wanted.get('title'), candidate.get('title')),
+        _similarity(_strip_extras(wanted.get('title')), _strip_extras(candidate.get('title'))),
+    )
+
+    wanted_artists = _split_artists(wanted.get('artist'))
+    candidate_artists = _split_artists(candidate.get('artist'))
+    if wanted_artists and candidate_artists:
+        artist = max(_similarity(wanted_artists[0], other) for other in candidate_artists)
+        if artist < MIN_ARTIST_SIMILARITY:
+            return 0.0
+    else:
+        artist = 0.0
+
+    wanted_ms = wanted.get('duration_ms') or 0
+    candidate_ms = candidate.get('duration_ms') or 0
+    if wanted_ms and candidate_ms:
+        delta = abs(wanted_ms - candidate_ms)
+        if delta <= DURATION_TOLERANCE_MS:
+            duration = 1.0
+        else:
+            duration = max(0.0, 1 - (delta - DURATION_TOLERANCE_MS) / (DURATION_LIMIT_MS - DURATION_TOLERANCE_MS))
+    else:
+        duration = 0.0
+
+    w_title, w_artist, w_duration = MATCH_WEIGHTS
+    return w_title * title + w_artist * artist + w_duration * duration
+
+
+def _pick_column(fieldnames, field):
+    by_name = {name.strip().lower(): name for name in fieldnames if name}
+    for alias in _CSV_COLUMNS[field]:
+        if alias in by_name:
+            return by_name[alias]
+    return None
+
+
+def read_track_list(path: str):
+    """Pistas buscadas desde un CSV (con cabecera) o un TXT ('Artista - Título' por línea).
+
+    Una pista con solo el título nunca llega a MATCH_THRESHOLD, así que las
+    líneas sin artista ni duración se rechazan (ValueError) en vez de
+    aparecer después como sin coincidencia.
+    """
+    tracks = []
+    incomplete = []  # Números de línea sin artista ni duración
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(f)
+            columns = {field: _pick_column(reader.fieldnames or [], field) for field in _CSV_COLUMNS}
+            if not columns['title']:
+                raise ValueError("El CSV no tiene una columna de título reconocible")
+            for row in reader:
+                title = (row.get(columns['title']) or '').strip()
+                if not title:
+                    continue
+                track = {
+                    'title': title,
+                    'artist': (row.get(columns['artist']) or '').strip() if columns['artist'] else '',
+                    'album': (row.get(columns['album']) or '').strip() if columns['album'] else '',
+                    'duration_ms': parse_duration(row.get(columns['duration_ms'])) if columns['duration_ms'] else 0,
+                }
+                if not track['artist'] and not track['duration_ms']:
+                    incomplete.append(reader.line_num)
+                tracks.append(track)
+        else:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                artist, sep, title = line.partition(' - ')
+                if not sep or not artist.strip() or not title.strip():
+                    incomplete.append(number)
+                    continue
+                tracks.append({'title': title.strip(), 'artist': artist.strip(), 'album': '', 'duration_ms': 0})
+
+    if incomplete:
+        shown = ', '.join(str(number) for number in incomplete[:10])
+        more = f" y {len(incomplete) - 10} más" if len(incomplete) > 10 else ''
+        raise ValueError(
+            f"Líneas sin artista ni duración ({shown}{more}): "
+            "el título solo no alcanza para emparejar, use 'Artista - Título'"
+        )
+    return tracks
+
+
+def ytmusic_list_id(source: str):
+    """ID de playlist/álbum de YT Music en un texto (ID suelto o enlace con list=/browse/). None si no hay"""
+    source = (source or '').strip()
+    match = re.search(r'[?&]list=([\w-]+)', source) or re.search(r'/browse/([\w-]+)', source)
+    candidate = match.group(1) if match else source
+    return candidate if _YTM_ID.match(candidate) else None
+
 class SpotifyDownloader(Downloader):
     """
     Descargador de música avanzado (Híbrido)
@@ -28,60 +202,165 @@ class SpotifyDownloader(Downloader):
     
     def __init__(self):
         super().__init__("Spotify")
-        self.ytm = YTMusic()
+        # Un cliente YTMusic por hilo (búsqueda de la UI y workers de importación),
+        # cada uno sobre la Session keep-alive de su hilo (core.http)
+        self._local = threading.local()
+
+    @property
+    def ytm(self) -> YTMusic:
+        client = getattr(self._local, 'ytm', None)
+        if client is None:
+            client = self._local.ytm = YTMusic(requests_session=get_session())
+        return client
 
-    def search_track(self, query):
+    @staticmethod
+    def _parse_item(item, album_name=None, cover_url=None):
+        """Pista de la API de YT Music -> dict de pista de la app. None si no tiene videoId"""
+        # Extraer ID inmutable para yt-dlp
+        video_id = item.get('videoId')
+        if not video_id:
+            return None
+
+        # Extraer título
+        title = item.get('title', 'Unknown')
+
+        # Extraer el string de artistas limpios
+        artists_list = [a.get('name') for a in item.get('artists') or [] if a.get('name')]
+        artists = ", ".join(artists_list) if artists_list else "Unknown Artist"
+
+        # Extraer álbum o disco
+        if album_name is None:
+            album = item.get('album', {})
+            album_name = album.get('name', 'Single / Unknown Album') if album else 'Single'
+
+        # Extraer cover art y FORZAR Resolución Máxima 1080x1080
+        thumbnails = item.get('thumbnails') or []
+        if thumbnails:
+            cover_url = thumbnails[-1]['url']
+        if cover_url and '=' in cover_url:
+            cover_url = cover_url.split('=')[0] + "=w1080-h1080-l90-rj"
+
+        # Duración
+        if item.get('duration_seconds'):
+            dur_ms = int(item['duration_seconds']) * 1000
+        else:
+            dur_ms = parse_duration(item.get('duration'))
+
+        return {
+            'title': title,
+            'artist': artists,
+            'album': album_name,
+            'cover_url': cover_url,
+            'duration_ms': dur_ms,
+            'id': video_id  # Guardamos el ID real ytmusic de la pista original
+        }
+
+    def search_track(self, query, limit=15):
         """Consulta pura en bases de datos de música (YT Music Studio) que reemplaza Spotify Web bloqueado"""
         try:
             # 1er filtro: Solo buscamos "songs" (pistas de estudio), excluyendo videoclips musicales oficiales
-            raw_results = self.ytm.search(query, filter="songs", limit=15)
-            clean_results = []
-            
-            for item in raw_results:
-                # Extraer título
-                title = item.get('title', 'Unknown')
-                
-                # Extraer el string de artistas limpios
-                artists_list = [a.get('name') for a in item.get('artists', []) if a.get('name')]
-                artists = ", ".join(artists_list) if artists_list else "Unknown Artist"
-                
-                # Extraer álbum o disco
-                album = item.get('album', {})
-                album_name = album.get('name', 'Single / Unknown Album') if album else 'Single'
-                
-                # Extraer cover art y FORZAR Resolución Máxima 1080x1080
-                thumbnails = item.get('thumbnails', [])
-                cover_url = thumbnails[-1]['url'] if thumbnails else None
-                if cover_url and '=' in cover_url:
-                    cover_url = cover_url.split('=')[0] + "=w1080-h1080-l90-rj"
-                
-                # Extraer ID inmutable para yt-dlp
-                video_id = item.get('videoId')
-                if not video_id:
-                    continue
-                    
-                # Duración
-                duration_str = item.get('duration', '0:00')
-                try:
-                    parts = duration_str.split(':')
-                    dur_ms = (int(parts[0]) * 60 + int(parts[1])) * 1000
-                except:
-                    dur_ms = 0
-
-                clean_results.append({
-                    'title': title,
-                    'artist': artists,
-                    'album': album_name,
-                    'cover_url': cover_url,
-                    'duration_ms': dur_ms,
-                    'id': video_id  # Guardamos el ID real ytmusic de la pista original
-                })
-                
-            return clean_results
+            raw_results = self.ytm.search(query, filter="songs", limit=limit)
+            return [track for track in map(self._parse_item, raw_results) if track]
         except Exception as e:
             print(f"Error en Búsqueda de Música: {e}")
             return []
 
+    def match_track(self, wanted: dict):
+        """Mejor resultado de YT Music para una pista {'title', 'artist', 'album', 'duration_ms'}.
+
+        Returns:
+            (track, score) con los metadatos de wanted (los de Spotify) y el
+            audio/portada del resultado, o (None, mejor_puntaje) si ninguno
+            alcanza MATCH_THRESHOLD.
+        """
+        query = f"{wanted.get('artist', '')} {wanted['title']}".strip()
+        best, best_score = None, 0.0
+        for candidate in self.search_track(query):
+            score = score_match(wanted, candidate)
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < MATCH_THRESHOLD:
+            return None, best_score
+
+        track = dict(best)
+        track['title'] = wanted['title']
+        track['artist'] = wanted.get('artist') or best['artist']
+        track['album'] = wanted.get('album') or best['album']
+        return track, best_score
+
+    def ytmusic_list_tracks(self, list_id: str):
+        """Pistas (ya con videoId) de una playlist o álbum de YT Music: una sola consulta, sin búsquedas"""
+        if list_id.startswith('MPREb_'):
+            album = self.ytm.get_album(list_id)
+            thumbnails = album.get('thumbnails') or []
+            cover_url = thumbnails[-1]['url'] if thumbnails else None
+            return [t for t in (self._parse_item(item, album.get('title'), cover_url)
+                                for item in album.get('tracks') or []) if t]
+        if list_id.startswith('VL'):
+            list_id = list_id[2:]
+        playlist = self.ytm.get_playlist(list_id, limit=None)
+        return [t for t in map(self._parse_item, playlist.get('tracks') or []) if t]
+
+    def import_tracks(self, source: str, on_track=None, max_workers: int = MATCH_WORKERS, should_stop=None):
+        """Importa una lista de pistas: archivo CSV/TXT o ID/enlace de playlist o álbum de YT Music.
+
+        Los archivos se emparejan en paralelo (max_workers búsquedas a la vez)
+        y on_track(wanted, track, score) se llama, en el hilo que importa, apenas
+        termina cada una, con track=None si no hubo coincidencia. Cuando
+        should_stop() devuelve True las búsquedas que aún no empezaron se
+        cancelan: no llaman a on_track y se cuentan aparte, no como fallidas.
+
+        Returns:
+            (emparejadas, sin_coincidencia, canceladas)
+        """
+        list_id = ytmusic_list_id(source)
+        if list_id:
+            tracks = self.ytmusic_list_tracks(list_id)
+            matched = 0
+            for track in tracks:
+                if should_stop and should_stop():
+                    break
+                matched += 1
+                if on_track:
+                    on_track(track, track, 1.0)
+            return matched, 0, len(tracks) - matched
+
+        wanted_tracks = read_track_list(source)
+        matched = unmatched = cancelled = 0
+
+        def match(wanted):
+            if should_stop and should_stop():
+                return _SKIPPED
+            return self.match_track(wanted)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ytm-match") as pool:
+            futures = {pool.submit(match, wanted): wanted for wanted in wanted_tracks}
+            for future in as_completed(futures):
+                if should_stop and should_stop():
+                    # Sacar de la cola del pool lo que no empezó (llegan como cancelados)
+                    for pending in futures:
+                        pending.cancel()
+                wanted = futures[future]
+                if future.cancelled():
+                    cancelled += 1
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error emparejando {wanted.get('artist')} - {wanted['title']}: {e}")
+                    result = (None, 0.0)
+                if result is _SKIPPED:
+                    cancelled += 1
+                    continue
+                track, score = result
+                if track:
+                    matched += 1
+                else:
+                    unmatched += 1
+                if on_track:
+                    on_track(wanted, track, score)
+        return matched, unmatched, cancelled
+
     def download_audio(self, url, output_path, progress_callback=None, title_callback=None):
         """Override obligatorio de la clase base. En Spotify se usa download_audio_with_tags."""
         return False, "Método obsoleto para Spotify downloader"
@@ -89,6 +368,18 @@ class SpotifyDownloader(Downloader):
     def download_audio_with_tags(self, track_data, output_path, progress_callback=None):
         """
         Descarga el audio y luego le inserta los metadatos de 'track_data' usando Mutagen.
+        Bloquea hasta que termina también la conversión y el etiquetado.
+        """
+        future = self.fetch_audio_with_tags(track_data, output_path, progress_callback)
+        return future.result()
+
+    def fetch_audio_with_tags(self, track_data, output_path, progress_callback=None):
+        """
+        Etapa de red: baja el stream crudo y la portada. La conversión a MP3 y la
+        inyección de tags se encolan en el pool de CPU (core.transcoder).
+
+        Returns:
+            Future que resuelve a (success, msg).
         """
         title = clean_filename(track_data['title'])
         artist = clean_filename(track_data['artist'])
@@ -101,19 +392,11 @@ class SpotifyDownloader(Downloader):
         
         output_filepath = os.path.join(output_path, f"{artist} - {title}.mp3")
         
-        # Opciones yt-dlp para sacar en mp3 puro a 192kbps (Buena fidelidad de Spotify)
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_filepath.replace('.mp3', '.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'quiet': True,
-            'no_warnings': True,
-            'logger': SpotifyLogger()
-        }
+        # Consultar el archivo de descargas antes de tocar la red
+        key = ('ytmusic', track_data['id'])
+        archived_title = self.check_archive(key=key)
+        if archived_title:
+            return transcoder.completed((True, archived_title))
         
         # Progreso custom
         def _hook(d):
@@ -125,59 +408,83 @@ class SpotifyDownloader(Downloader):
                     pass
             elif d['status'] == 'finished' and progress_callback:
                 progress_callback(1.0)
-                
-        ydl_opts['progress_hooks'] = [_hook]
         
-        ffmpeg_local_path = os.path.join(os.getcwd(), 'ffmpeg', 'bin')
-        if os.path.exists(ffmpeg_local_path):
-            ydl_opts['ffmpeg_location'] = ffmpeg_local_path
+        # ffmpeg resuelto una vez por proceso, sin depender del directorio actual
+        ffmpeg_location = get_toolchain().location
 
         try:
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(direct_url, download=True)
+            # Perfil 'audio' del pool: solo el stream crudo, sin postprocesado
+            outtmpl = output_filepath.replace('.mp3', '.%(ext)s')
+            with lease('audio', outtmpl=outtmpl, progress_hooks=[_hook]) as ydl:
+                info = ydl.extract_info(direct_url, download=True)
+            src_path = downloaded_filepath(info)
+            if not src_path or not os.path.exists(src_path):
+                return transcoder.completed((False, "No se generó el archivo de salida"))
                 
-            # === INYECCIÓN DE ID3 TAGS y COVER ART (MUTAGEN) ===
-            if os.path.exists(output_filepath):
+            # La portada también es red: se baja aquí para no ocupar el pool de CPU
+            cover_data = None
+            if cover_url:
                 try:
-                    audio = MP3(output_filepath, ID3=ID3)
-                    
-                    if audio.tags is None:
-                        audio.add_tags()
-                        
-                    # Título
-                    audio.tags.add(TIT2(encoding=3, text=track_data['title']))
-                    # Artista
-                    audio.tags.add(TPE1(encoding=3, text=track_data['artist']))
-                    # Álbum
-                    audio.tags.add(TALB(encoding=3, text=track_data['album']))
-                    
-                    # Portada (APIC)
-                    if cover_url:
-                        try:
-                            img_response = requests.get(cover_url, timeout=10)
-                            if img_response.status_code == 200:
-                                audio.tags.add(
-                                    APIC(
-                                        encoding=3,
-                                        mime='image/jpeg',
-                                        type=3, # Tipo 3 es Front Cover
-                                        desc=u'Cover',
-                                        data=img_response.content
-                                    )
-                                )
-                        except Exception as img_e:
-                            print(f"Warning cover: {img_e}")
-                            
-                    # Guardarlo en versión 2.3 explícitamente porque Windows Media Player 
-                    # y el Explorador de Windows NO soportan el estándar Id3v2.4 por defecto.
-                    audio.save(v2_version=3)
-                    return True, f"{artist} - {title}.mp3"
-                except Exception as tag_err:
-                    print(f"La descarga funcionó pero falló el etiquetado MP3: {tag_err}")
-                    return True, f"{artist} - {title}.mp3 (Sin tags)"
-            else:
-                return False, "No se generó el archivo de salida"
+                    # Normalmente ya está en la caché de imágenes por la vista previa
+                    cover_data = fetch_image(cover_url, session=self.http)
+                except Exception as img_e:
+                    print(f"Warning cover: {img_e}")
+
+            return transcoder.submit(
+                self._transcode_and_tag, src_path, output_filepath, track_data,
+                cover_data, ffmpeg_location, f"{artist} - {title}", key
+            )
                 
         except Exception as e:
             print(f"✖ Error fatal de descarga híbrida ({artist} - {title}): {e}")
+            return transcoder.completed((False, str(e)))
+
+    def _transcode_and_tag(self, src_path, output_filepath, track_data, cover_data, ffmpeg_location, base_name, key=None):
+        """Etapa de CPU: MP3 a 192kbps (Buena fidelidad de Spotify) + ID3 tags"""
+        try:
+            transcoder.transcode_to_mp3(
+                src_path, output_filepath, bitrate='192', ffmpeg_location=ffmpeg_location
+            )
+        except Exception as e:
+            print(f"✖ Error convirtiendo a MP3 ({base_name}): {e}")
             return False, str(e)
+
+        # === INYECCIÓN DE ID3 TAGS y COVER ART (MUTAGEN) ===
+        if not os.path.exists(output_filepath):
+            return False, "No se generó el archivo de salida"
+        try:
+            audio = MP3(output_filepath, ID3=ID3)
+            
+            if audio.tags is None:
+                audio.add_tags()
+                
+            # Título
+            audio.tags.add(TIT2(encoding=3, text=track_data['title']))
+            # Artista
+            audio.tags.add(TPE1(encoding=3, text=track_data['artist']))
+            # Álbum
+            audio.tags.add(TALB(encoding=3, text=track_data['album']))
+            
+            # Portada (APIC)
+            if cover_data:
+                audio.tags.add(
+                    APIC(
+                        encoding=3,
+                        mime='image/jpeg',
+                        type=3, # Tipo 3 es Front Cover
+                        desc=u'Cover',
+                        data=cover_data
+                    )
+                )
+                    
+            # Guardarlo en versión 2.3 explícitamente porque Windows Media Player 
+            # y el Explorador de Windows NO soportan el estándar Id3v2.4 por defecto.
+            audio.save(v2_version=3)
+            self.record_archive(key, f"{base_name}.mp3", output_filepath)
+            return True, f"{base_name}.mp3"
+        except Exception as tag_err:
+            print(f"La descarga funcionó pero falló el etiquetado MP3: {tag_err}")
+            # El MP3 ya está en disco y se reporta como éxito: registrarlo igual
+            # para no volver a bajarlo y convertirlo en cada ejecución
+            self.record_archive(key, f"{base_name}.mp3", output_filepath)
+            return True, f"{base_name}.mp3 (Sin tags)"
@@ -1,9 +1,14 @@
 import os
-import requests
 import re
 from urllib.parse import urlparse, parse_qs
 
 from core.base_downloader import Downloader
+from core import transfer
+from core.info_cache import EXPIRED_STATUSES
+
+
+# Short links (vm./vt.) ya resueltos que se conservan por instancia
+SHORT_LINK_CACHE = 256
 
 
 class TikTokDownloader(Downloader):
@@ -12,6 +17,9 @@ class TikTokDownloader(Downloader):
     def __init__(self):
         super().__init__("TikTok")
         self.api_url = "https://www.tikwm.com/api/"
+        # Short link -> ID de video: check_archive, la clave de la caché de info
+        # y la vista previa piden el ID de la misma URL, con un HEAD cada vez
+        self._short_links = {}
     
     def _extract_video_id(self, url: str) -> str:
         """Extrae el ID del video de la URL de TikTok"""
@@ -22,28 +30,38 @@ class TikTokDownloader(Downloader):
         if match:
             return match.group(1)
         
-        # Si es short link, intentar resolverlo
+        # Si es short link, intentar resolverlo (una sola vez por URL)
         if 'vm.tiktok.com' in url or 'vt.tiktok.com' in url:
+            video_id = self._short_links.get(url)
+            if video_id:
+                return video_id
             try:
-                response = requests.head(url, allow_redirects=True, timeout=10)
+                response = self.http.head(url, allow_redirects=True, timeout=10)
                 final_url = response.url
                 match = re.search(r'/video/(\d+)', final_url)
                 if match:
+                    if len(self._short_links) >= SHORT_LINK_CACHE:
+                        # Descartar el más antiguo (orden de inserción)
+                        self._short_links.pop(next(iter(self._short_links)), None)
+                    self._short_links[url] = match.group(1)
                     return match.group(1)
             except:
                 pass
         
         return None
     
-    def get_video_info(self, url: str):
-        """Extrae información del video sin descargar"""
+    def get_video_info(self, url: str, refresh: bool = False):
+        """Extrae información del video sin descargar (cacheada hasta que vence su URL directa)"""
+        return self.cached_info(url, lambda: self._fetch_video_info(url), refresh=refresh)
+
+    def _fetch_video_info(self, url: str):
         try:
             params = {
                 'url': url,
                 'hd': 1
             }
             
-            response = requests.post(self.api_url, data=params, timeout=15)
+            response = self.http.post(self.api_url, data=params, timeout=15)
             
             if response.status_code != 200:
                 print(f"Error API: Status {response.status_code}")
@@ -79,9 +97,19 @@ class TikTokDownloader(Downloader):
             print(f"Error obteniendo info: {e}")
             return None
     
+    def archive_key(self, url: str):
+        video_id = self._extract_video_id(url)
+        return ('tiktok', video_id) if video_id else None
+
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
         """Descarga video desde TikTok"""
         try:
+            # Consultar el archivo de descargas antes de llamar a la API
+            key = self.archive_key(url)
+            archived_title = self.check_archive(key=key)
+            if archived_title:
+                return True, archived_title
+
             # Obtener información del video
             info = self.get_video_info(url)
             
@@ -90,7 +118,7 @@ class TikTokDownloader(Downloader):
                 return False, ''
             
             author = info.get('author', 'tiktok_user')
-            video_id = self._extract_video_id(url) or 'video'
+            video_id = key[1] if key else 'video'
             
             # Notificar título
             title = f"{author}_{video_id}"
@@ -103,36 +131,34 @@ class TikTokDownloader(Downloader):
             if progress_callback:
                 progress_callback(0.1)
             
-            response = requests.get(download_url, stream=True, timeout=30)
-            
-            if response.status_code != 200:
-                print(f"✖ Error al descargar: Status {response.status_code}")
-                return False, ''
-            
-            # Obtener tamaño total
-            total_size = int(response.headers.get('content-length', 0))
-            
             # Guardar archivo
             filename = f"{author}_{video_id}.mp4"
             filepath = os.path.join(output_path, filename)
             
-            downloaded = 0
-            chunk_size = 8192
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        # Actualizar progreso
-                        if progress_callback and total_size > 0:
-                            progress = downloaded / total_size
-                            progress_callback(progress)
+            # Rangos en paralelo si el CDN lo permite, stream único si no
+            try:
+                try:
+                    transfer.download_file(
+                        download_url, filepath, progress_callback, session=self._session
+                    )
+                except transfer.TransferError as e:
+                    if e.status not in EXPIRED_STATUSES:
+                        raise
+                    # La URL de la caché venció: pedir una nueva a la API y reintentar una vez
+                    info = self.get_video_info(url, refresh=True)
+                    if not info or not info.get('download_url'):
+                        raise
+                    transfer.download_file(
+                        info['download_url'], filepath, progress_callback, session=self._session
+                    )
+            except transfer.TransferError as e:
+                print(f"✖ Error al descargar: {e}")
+                return False, ''
             
             if progress_callback:
                 progress_callback(1.0)
             
+            self.record_archive(key, title, filepath)
             print(f"✓ Descarga exitosa: {filename}")
             return True, title
             
@@ -1,12 +1,6 @@
-import os
-from yt_dlp import YoutubeDL
 from core.base_downloader import Downloader
-
-class YTDLPLogger:
-    def debug(self, msg): pass
-    def info(self, msg): pass
-    def warning(self, msg): pass
-    def error(self, msg): pass
+from core.ytdlp_pool import lease
+from core.ytdlp_helpers import download_extracted, downloaded_filepath, extract_cached, literal_outtmpl, url_archive_key, info_archive_key
 
 def _progress_hook(d, callback=None, title_callback=None):
     status = d.get('status')
@@ -37,14 +31,8 @@ class TwitterDownloader(Downloader):
         url = url.strip()
         
         try:
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'logger': YTDLPLogger(),
-            }
-
-            with YoutubeDL(ydl_opts_info) as ydl:
-                info = ydl.extract_info(url, download=False)
+            with lease('info') as ydl:
+                info = extract_cached(self, ydl, url)
                 
                 title = info.get('title', 'Video de X (Twitter)')
                 author = info.get('uploader', 'Usuario de X (Twitter)')
@@ -71,17 +59,21 @@ class TwitterDownloader(Downloader):
             print(f"✖ Error obteniendo info de X (Twitter): {e}")
             return None
 
+    def archive_key(self, url: str):
+        return url_archive_key(url)
+
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
         """Descarga el video de X (Twitter) usando yt-dlp."""
-        try:
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'logger': YTDLPLogger(),
-            }
+        # Consultar el archivo de descargas antes de tocar la red
+        archived_title = self.check_archive(url)
+        if archived_title:
+            return True, archived_title
 
-            with YoutubeDL(ydl_opts_info) as ydl:
-                info = ydl.extract_info(url, download=False)
+        try:
+            # Perfil 'mp4' del pool: formato MP4 con audio, fusionado con ffmpeg
+            hooks = [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)]
+            with lease('mp4', progress_hooks=hooks) as ydl:
+                info = extract_cached(self, ydl, url)
                 title = info.get('title', 'Video_X')
                 import re
                 
@@ -93,30 +85,21 @@ class TwitterDownloader(Downloader):
                     import time
                     safe_title = f"TwitterVideo_{int(time.time())}"
 
-            if title_callback:
-                title_callback(safe_title)
+                key = info_archive_key(info)
+                archived_title = self.check_archive(key=key)
+                if archived_title:
+                    return True, archived_title
 
-            ydl_opts = {
-                'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                'outtmpl': os.path.join(output_path, f'{safe_title}.%(ext)s'),
-                'merge_output_format': 'mp4',
-                'noplaylist': True,
-                'progress_hooks': [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)],
-                'logger': YTDLPLogger(),
-                'no_warnings': True,
-                'quiet': True,
-                'overwrites': True,
-            }
-            
-            ffmpeg_local_path = os.path.join(os.getcwd(), 'ffmpeg', 'bin')
-            if os.path.exists(ffmpeg_local_path):
-                ydl_opts['ffmpeg_location'] = ffmpeg_local_path
+                if title_callback:
+                    title_callback(safe_title)
 
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(url, download=True)
+                info = download_extracted(ydl, info, literal_outtmpl(output_path, safe_title))
+                self.record_archive(key, safe_title, downloaded_filepath(info))
                 print(f"✓ Descarga exitosa: {safe_title}.mp4")
                 return True, safe_title
             
         except Exception as e:
             print(f"✖ Error procesando descarga en X (Twitter) {url}: {e}")
+            # Formatos vencidos o extracción inválida: el próximo intento vuelve a extraer
+            self.invalidate_info(url)
             return False, ''
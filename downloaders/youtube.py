@@ -1,21 +1,12 @@
 import os
 import re
-from yt_dlp import YoutubeDL
+from urllib.parse import parse_qs, urlparse
+from yt_dlp.utils import sanitize_path
 from core.base_downloader import Downloader
-
-
-class YTDLPLogger:
-    def debug(self, msg):
-        pass
-
-    def info(self, msg):
-        pass
-
-    def warning(self, msg):
-        pass
-
-    def error(self, msg):
-        pass
+from core.toolchain import get_toolchain
+from core import transcoder
+from core.ytdlp_pool import lease
+from core.ytdlp_helpers import download_extracted, downloaded_filepath, literal_outtmpl, url_archive_key, info_archive_key
 
 
 def remove_emojis(text):
@@ -44,6 +35,28 @@ def remove_emojis(text):
     return emoji_pattern.sub(r'', text)
 
 
+# Rutas de YouTube que listan varios videos (playlists y pestañas de canal)
+_LISTING_PATH = re.compile(r'^/(?:playlist|@[^/]+|channel/|c/|user/|browse/)', re.IGNORECASE)
+# Niveles de listados anidados a seguir (canal -> pestaña -> videos)
+MAX_LISTING_DEPTH = 3
+
+
+def is_listing_url(url: str) -> bool:
+    """True si la URL es una playlist o un canal (no un video suelto).
+
+    Un enlace a un video dentro de una playlist (watch?v=...&list=...) sigue
+    siendo un video, igual que con noplaylist.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if 'youtube.com' not in host:
+        return False
+    query = parse_qs(parsed.query)
+    if 'v' in query or parsed.path.startswith(('/watch', '/shorts/', '/live/')):
+        return False
+    return 'list' in query or bool(_LISTING_PATH.match(parsed.path))
+
+
 def _progress_hook(d, callback=None, title_callback=None):
     status = d.get('status')
     if status == 'downloading':
@@ -66,77 +79,160 @@ class YouTubeDownloader(Downloader):
     def __init__(self):
         super().__init__("YouTube")
     
+    def archive_key(self, url: str):
+        return url_archive_key(url)
+
+    def iter_listing(self, url: str):
+        """URLs de los videos de una playlist o canal, a medida que yt-dlp pagina.
+
+        Con process=False las entradas llegan sin resolver y las páginas del
+        listado se piden solo cuando el consumidor avanza, así la descarga de
+        los primeros videos empieza antes de conocer el listado completo.
+        """
+        seen = set()
+        with lease('flat') as ydl:
+            yield from self._listing_entries(ydl, url, 0, seen)
+
+    def _listing_entries(self, ydl, url, depth, seen):
+        result = ydl.extract_info(url, download=False, process=False)
+        yield from self._walk_listing(ydl, result, depth, seen)
+
+    def _walk_listing(self, ydl, result, depth, seen):
+        kind = result.get('_type', 'video')
+        if kind in ('playlist', 'multi_video'):
+            for entry in result.get('entries') or []:
+                if entry:
+                    yield from self._walk_listing(ydl, entry, depth, seen)
+            return
+
+        target = result.get('webpage_url') or result.get('url')
+        if kind in ('url', 'url_transparent') and target and (
+                result.get('ie_key') == 'YoutubeTab' or is_listing_url(target)):
+            # Pestaña de canal o playlist anidada: se expande en su turno
+            if depth < MAX_LISTING_DEPTH:
+                yield from self._listing_entries(ydl, target, depth + 1, seen)
+            return
+
+        video_id = result.get('id')
+        if not target and video_id:
+            target = f"https://www.youtube.com/watch?v={video_id}"
+        if target and (video_id or target) not in seen:
+            seen.add(video_id or target)
+            yield target
+
     def download_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
-        """Descarga audio desde YouTube"""
-        try:
-            # Primero extraer el título sin descargar
-            ydl_opts_info = {
-                'quiet': True,
-                'no_warnings': True,
-                'logger': YTDLPLogger(), # Silenciar errores crudos
-            }
+        """Descarga audio desde YouTube (espera también a la conversión a MP3)"""
+        future, title = self.fetch_audio(url, output_path, progress_callback, title_callback)
+        if future is None:
+            return False, ''
+        return future.result()
+
+    def fetch_audio(self, url: str, output_path: str, progress_callback=None, title_callback=None):
+        """Etapa de red: baja el stream 'bestaudio' crudo y encola la conversión.
 
-            with YoutubeDL(ydl_opts_info) as ydl:
+        Returns:
+            (future, title): future resuelve a (success, title) cuando termina la
+            conversión a MP3 en el pool de CPU; (None, '') si falló la descarga.
+        """
+        # Consultar el archivo de descargas antes de tocar la red
+        archived_title = self.check_archive(url)
+        if archived_title:
+            return transcoder.completed((True, archived_title)), archived_title
+
+        src_path = None
+        try:
+            # ffmpeg resuelto una vez por proceso, sin depender del directorio actual
+            ffmpeg_location = get_toolchain().location
+
+            # Una sola instancia (prestada del pool, perfil 'audio'): la metadata
+            # extraída se reutiliza para la descarga. El outtmpl se fija después
+            # de conocer el título. Sin postprocesadores: la conversión a MP3 se
+            # hace fuera del slot de red (core.transcoder).
+            hooks = [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)]
+            with lease('audio', progress_hooks=hooks) as ydl:
+                # Primero extraer el título sin descargar
                 info = ydl.extract_info(url, download=False)
                 original_title = info.get('title', 'audio')
                 # Eliminar emojis del título
                 original_title = remove_emojis(original_title)
 
-            # Notificar el título de inmediato
-            if title_callback:
-                title_callback(original_title)
-
-            # Verificar si existe ffmpeg localmente
-            ffmpeg_local_path = os.path.join(os.getcwd(), 'ffmpeg', 'bin')
-            ffmpeg_location = ffmpeg_local_path if os.path.exists(ffmpeg_local_path) else None
-
-            # Ahora descargar
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': os.path.join(output_path, f'{original_title}.%(ext)s'),
-                'postprocessors': [
-                    {'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '320'},
-                    {'key': 'FFmpegMetadata'},
-                ],
-                'ffmpeg_location': ffmpeg_location,
-                'noplaylist': True,
-                'ignoreerrors': False,
-                'progress_hooks': [lambda d: _progress_hook(d, callback=progress_callback, title_callback=title_callback)],
-                'logger': YTDLPLogger(),
-                'no_warnings': True,
-                'quiet': True,
-                'overwrites': True,
+                # La URL pudo no mapear a un id (p. ej. con &list=): revisar con el id real
+                key = info_archive_key(info)
+                archived_title = self.check_archive(key=key)
+                if archived_title:
+                    return transcoder.completed((True, archived_title)), archived_title
+
+                # Notificar el título de inmediato
+                if title_callback:
+                    title_callback(original_title)
+
+                # Ahora descargar reutilizando el info dict (sin segunda extracción)
+                info = download_extracted(ydl, info, literal_outtmpl(output_path, original_title))
+
+            src_path = downloaded_filepath(info)
+            if not src_path or not os.path.exists(src_path):
+                raise FileNotFoundError("yt-dlp no dejó el stream de audio en disco")
+
+            # Metadata equivalente a la que escribía FFmpegMetadata
+            metadata = {
+                'title': info.get('title'),
+                'artist': info.get('artist') or info.get('uploader') or info.get('channel'),
+                'album': info.get('album'),
+                'date': info.get('upload_date'),
+                'comment': info.get('webpage_url'),
             }
-
-            with YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                print(f"✅ Descarga exitosa: {original_title}")
-                return True, original_title
+            # Mismo nombre (ya saneado por yt-dlp) que el stream en disco
+            dst_path = os.path.splitext(src_path)[0] + ".mp3"
+            future = transcoder.submit(
+                self._transcode, src_path, dst_path, metadata, ffmpeg_location,
+                original_title, key
+            )
+            return future, original_title
 
         except Exception as e:
             print(f"❌ Error al procesar {url}: {e}")
             
-            # Limpieza de archivos residuales (.webm, .m4a, .part, .ytdl)
-            if 'original_title' in locals() and original_title:
-                try:
-                    # Patrones comunes de archivos temporales o no convertidos
-                    extensions_to_clean = ['.webm', '.m4a', '.mp4', '.part', '.ytdl']
-                    
-                    # Intentar borrar archivos que coincidan exactamente con el nombre base
-                    base_filename = os.path.join(output_path, original_title)
-                    
-                    for ext in extensions_to_clean:
-                        file_path = base_filename + ext
-                        if os.path.exists(file_path):
-                            try:
-                                os.remove(file_path)
-                                print(f"🧹 Eliminado residuo: {file_path}")
-                            except OSError:
-                                pass
-                                
-                    # Búsqueda más agresiva si el nombre fue modificado por yt-dlp
-                    # (esto es opcional pero ayuda si yt-dlp saneó el nombre de otra forma)
-                except Exception as cleanup_error:
-                    print(f"⚠️ Error limpiando residuos: {cleanup_error}")
+            # Limpieza de archivos residuales (.webm, .m4a). Los .part/.ytdl se
+            # conservan para que el siguiente intento retome la descarga
+            if src_path:
+                self._clean_residuals(os.path.splitext(src_path)[0])
+            elif 'original_title' in locals() and original_title:
+                # yt-dlp sanea la ruta de salida (en Windows reemplaza ?:|"*<>)
+                self._clean_residuals(sanitize_path(os.path.join(output_path, original_title)))
                     
+            return None, ''
+
+    def _transcode(self, src_path, dst_path, metadata, ffmpeg_location, title, key=None):
+        """Etapa de CPU: convierte el stream crudo a MP3 320 kbps"""
+        try:
+            transcoder.transcode_to_mp3(
+                src_path, dst_path, bitrate='320',
+                metadata=metadata, ffmpeg_location=ffmpeg_location
+            )
+            self.record_archive(key, title, dst_path)
+            print(f"✅ Descarga exitosa: {title}")
+            return True, title
+        except Exception as e:
+            print(f"❌ Error convirtiendo {title} a MP3: {e}")
+            self._clean_residuals(os.path.splitext(dst_path)[0])
             return False, ''
+
+    def _clean_residuals(self, base_filename):
+        """Elimina archivos temporales o no convertidos de una descarga fallida.
+
+        base_filename es la ruta sin extensión tal como la escribió yt-dlp.
+        """
+        try:
+            # Patrones comunes de archivos temporales o no convertidos
+            extensions_to_clean = ['.webm', '.m4a', '.mp4', '.mp3.transcoding']
+
+            for ext in extensions_to_clean:
+                file_path = base_filename + ext
+                if os.path.exists(file_path):
+                    try:
+                        os.remove(file_path)
+                        print(f"🧹 Eliminado residuo: {file_path}")
+                    except OSError:
+                        pass
+        except Exception as cleanup_error:
+            print(f"⚠️ Error limpiando residuos: {cleanup_error}")
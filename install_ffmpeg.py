@@ -1,65 +1,178 @@
+"""Instala ffmpeg y ffprobe en ffmpeg/bin (junto a este script).
+
+Uso:
+    python install_ffmpeg.py [--dest CARPETA] [--no-verify]
+
+Windows: build "essentials" de gyan.dev (ZIP). Linux: build estática de
+johnvansickle.com (tar.xz, x86_64 o arm64). El archivo se descarga a disco,
+no a memoria, y si la descarga se corta basta con volver a ejecutar el script
+para continuar donde quedó. Antes de extraer se verifica el checksum publicado
+y solo se copian los dos ejecutables.
+"""
+import argparse
+import hashlib
 import os
+import platform
+import re
+import shutil
 import sys
-import requests
+import tarfile
 import zipfile
-import io
-
-def install_ffmpeg():
-    print("⬇️  Iniciando descarga de FFmpeg (aprox. 25MB)...")
-    print("    Si tarda un poco es normal, por favor espera.")
-    
-    # URL directa a la versión "essentials" (más ligera) y específica para Windows 64-bit
-    # Usando el release 'latest' de gyan.dev que es el mirror oficial recomendado
-    url = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
-    
+
+import requests
+
+from core import transfer
+from core.http import get_session
+from core.paths import app_data_dir
+
+
+# (sistema, arquitectura) -> (URL del archivo, URL del checksum, algoritmo)
+BUILDS = {
+    ('windows', 'x86_64'): (
+        "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip",
+        "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip.sha256",
+        'sha256',
+    ),
+    ('linux', 'x86_64'): (
+        "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz",
+        "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz.md5",
+        'md5',
+    ),
+    ('linux', 'arm64'): (
+        "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz",
+        "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-arm64-static.tar.xz.md5",
+        'md5',
+    ),
+}
+_MACHINES = {'amd64': 'x86_64', 'x86_64': 'x86_64', 'aarch64': 'arm64', 'arm64': 'arm64'}
+
+DEFAULT_DEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ffmpeg", "bin")
+COPY_BUFFER = 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+
+class InstallError(Exception):
+    pass
+
+
+def select_build():
+    system = platform.system().lower()
+    machine = _MACHINES.get(platform.machine().lower(), platform.machine().lower())
+    build = BUILDS.get((system, machine))
+    if build is None:
+        raise InstallError(f"No hay build de FFmpeg configurada para {system}/{machine}. "
+                           "Instálalo con el gestor de paquetes del sistema.")
+    return build
+
+
+def executable_names():
+    suffix = ".exe" if os.name == "nt" else ""
+    return {f"ffmpeg{suffix}", f"ffprobe{suffix}"}
+
+
+def _print_progress(ratio):
+    print(f"\r    {ratio * 100:5.1f}%", end="", flush=True)
+
+
+def fetch_checksum(checksum_url):
+    """Hash publicado junto al archivo (los .sha256/.md5 traen el hex, a veces con el nombre)"""
+    response = get_session().get(checksum_url, timeout=15)
+    if response.status_code != 200:
+        raise InstallError(f"No se pudo obtener el checksum ({response.status_code}): {checksum_url}")
+    match = re.search(r'\b[0-9a-fA-F]{32,128}\b', response.text)
+    if not match:
+        raise InstallError(f"Checksum ilegible en {checksum_url}")
+    return match.group().lower()
+
+
+def file_digest(path, algorithm):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_member(source, dest_path):
+    # Escribir a un temporal y renombrar: un ffmpeg a medio copiar nunca queda en bin/
+    tmp_path = dest_path + ".tmp"
+    with open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(source, dst, COPY_BUFFER)
+    if os.name != "nt":
+        os.chmod(tmp_path, 0o755)
+    os.replace(tmp_path, dest_path)
+
+
+def extract_binaries(archive_path, dest_dir):
+    """Extrae solo ffmpeg/ffprobe del ZIP o tar.xz, en streaming directo a dest_dir"""
+    wanted = executable_names()
+    found = set()
+    os.makedirs(dest_dir, exist_ok=True)
+
+    if archive_path.endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as z:
+            for info in z.infolist():
+                name = os.path.basename(info.filename)
+                if name in wanted and "/bin/" in f"/{info.filename}":
+                    with z.open(info) as source:
+                        _copy_member(source, os.path.join(dest_dir, name))
+                    found.add(name)
+    else:
+        # Lectura secuencial: el tar.xz no se descomprime completo en disco ni en memoria
+        with tarfile.open(archive_path, 'r|xz') as tar:
+            for member in tar:
+                name = os.path.basename(member.name)
+                if member.isfile() and name in wanted:
+                    _copy_member(tar.extractfile(member), os.path.join(dest_dir, name))
+                    found.add(name)
+
+    missing = wanted - found
+    if missing:
+        raise InstallError(f"No se encontraron {', '.join(sorted(missing))} en el archivo descargado.")
+
+
+def install_ffmpeg(dest_dir=DEFAULT_DEST, verify=True):
+    url, checksum_url, algorithm = select_build()
+    archive_path = os.path.join(app_data_dir("ffmpeg_download"), url.rsplit("/", 1)[-1])
+
+    print(f"⬇️  Descargando FFmpeg: {url}")
+    print("    Si se interrumpe, vuelve a ejecutar el script y continuará donde quedó.")
+    transfer.download_file(url, archive_path, _print_progress)
+    print()
+
+    if verify:
+        print(f"🔐 Verificando {algorithm}...")
+        expected = fetch_checksum(checksum_url)
+        actual = file_digest(archive_path, algorithm)
+        if actual != expected:
+            os.remove(archive_path)
+            raise InstallError(f"Checksum incorrecto (esperado {expected}, obtenido {actual}). "
+                               "Se borró el archivo; vuelve a intentarlo.")
+
+    print("📦 Extrayendo ffmpeg y ffprobe...")
+    extract_binaries(archive_path, dest_dir)
+    os.remove(archive_path)
+
+    print("-" * 50)
+    print("✅ ¡INSTALACIÓN COMPLETADA!")
+    print(f"    Archivos guardados en: {dest_dir}")
+    print("🚀 Ahora reinicia tu aplicación (main.py) y el error debería haber desaparecido.")
+    print("-" * 50)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Descarga e instala ffmpeg/ffprobe para Nova Hub.")
+    parser.add_argument('--dest', default=DEFAULT_DEST, help=f"Carpeta destino (por defecto {DEFAULT_DEST})")
+    parser.add_argument('--no-verify', action='store_true', help="No verificar el checksum publicado")
+    args = parser.parse_args(argv)
     try:
-        # Descargar con stream para no cargar todo en memoria
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        print("📦 Extrayendo archivos...")
-        
-        # Usar io.BytesIO para manejar el zip en memoria
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            # Buscar los archivos ejecutables dentro de la estructura del zip
-            ffmpeg_data = None
-            ffprobe_data = None
-            
-            for file_info in z.infolist():
-                if file_info.filename.endswith("bin/ffmpeg.exe"):
-                    ffmpeg_data = z.read(file_info)
-                elif file_info.filename.endswith("bin/ffprobe.exe"):
-                    ffprobe_data = z.read(file_info)
-            
-            if not ffmpeg_data or not ffprobe_data:
-                print("❌ No se encontraron ffmpeg.exe o ffprobe.exe en el ZIP descargado.")
-                return
-
-            # Definir carpeta de destino: ./ffmpeg/bin/
-            base_dir = os.getcwd()
-            dest_dir = os.path.join(base_dir, "ffmpeg", "bin")
-            
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-                print(f"📁 Carpeta creada: {dest_dir}")
-            
-            # Escribir los archivos
-            ffmpeg_path = os.path.join(dest_dir, "ffmpeg.exe")
-            with open(ffmpeg_path, "wb") as f:
-                f.write(ffmpeg_data)
-                
-            ffprobe_path = os.path.join(dest_dir, "ffprobe.exe")
-            with open(ffprobe_path, "wb") as f:
-                f.write(ffprobe_data)
-                
-        print("-" * 50)
-        print(f"✅ ¡INSTALACIÓN COMPLETADA!")
-        print(f"    Archivos guardados en: {dest_dir}")
-        print("🚀 Ahora reinicia tu aplicación (main.py) y el error debería haber desaparecido.")
-        print("-" * 50)
-        
-    except Exception as e:
-        print(f"❌ Ocurrió un error: {e}")
+        install_ffmpeg(args.dest, verify=not args.no_verify)
+    except (InstallError, transfer.TransferError, requests.RequestException, OSError,
+            zipfile.BadZipFile, tarfile.TarError) as e:
+        print(f"\n❌ Ocurrió un error: {e}")
+        return 1
+    return 0
+
 
 if __name__ == "__main__":
-    install_ffmpeg()
+    sys.exit(main())
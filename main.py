@@ -1,4 +1,11 @@
 import sys
+
+from core import startup_profiler
+
+# Perfil de arranque opcional (NOVAHUB_PROFILE_STARTUP=1 o --profile-startup):
+# se activa antes de importar PySide6 para medir también esos imports
+startup_profiler.enable(sys.argv)
+
 from PySide6.QtWidgets import QApplication
 from ui.main import NovaHub
 
@@ -6,6 +13,7 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = NovaHub()
     window.showMaximized()
+    startup_profiler.mark('window_shown')
     try:
         sys.exit(app.exec())
     except KeyboardInterrupt:
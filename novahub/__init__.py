@@ -0,0 +1 @@
+# Entrada sin interfaz gráfica: python -m novahub (ver novahub/cli.py)
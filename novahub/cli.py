@@ -0,0 +1,302 @@
+"""Descargas por lotes sin interfaz gráfica.
+
+Uso:
+    python -m novahub URL [URL ...]
+    python -m novahub -i enlaces.txt -o descargas -j 4
+    cat enlaces.txt | python -m novahub -i - --format mp4
+
+Cada línea de entrada es una URL o "spotify:<búsqueda>" (título/artista en YT
+Music, igual que el buscador de la vista Spotify). Las líneas vacías y las que
+empiezan con '#' se ignoran.
+
+La salida estándar es JSON lines (un evento por línea: start, title, progress,
+transcoding, done, summary); los mensajes de los descargadores van a stderr.
+Códigos de salida: 0 todo correcto, 1 alguna descarga falló, 2 error de uso,
+130 interrumpido.
+
+No importa PySide6: los descargadores se cargan solo cuando hace falta.
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+PROGRESS_INTERVAL = 0.5     # Segundos mínimos entre eventos "progress" de un mismo trabajo
+
+SPOTIFY_PREFIX = 'spotify:'
+
+# Dominio -> plataforma. Lo que no coincide va al descargador Universal
+_PLATFORM_HOSTS = (
+    ('youtube', ('youtube.com', 'youtu.be')),
+    ('tiktok', ('tiktok.com',)),
+    ('instagram', ('instagram.com',)),
+    ('facebook', ('facebook.com', 'fb.watch', 'fb.com')),
+    ('twitter', ('twitter.com', 'x.com')),
+)
+
+# (plataforma, formato) -> descargador que produce ese formato
+_ROUTES = {
+    ('youtube', 'mp3'): 'youtube',
+    ('youtube', 'mp4'): 'universal',
+    ('spotify', 'mp3'): 'spotify',
+    ('tiktok', 'mp4'): 'tiktok',
+    ('instagram', 'mp4'): 'instagram',
+    ('facebook', 'mp4'): 'facebook',
+    ('facebook', 'mp3'): 'youtube',
+    ('twitter', 'mp4'): 'twitter',
+    ('twitter', 'mp3'): 'youtube',
+    ('universal', 'mp4'): 'universal',
+    ('universal', 'mp3'): 'youtube',   # Extracción de audio yt-dlp, válida para cualquier sitio
+}
+_DEFAULT_FORMAT = {'youtube': 'mp3', 'spotify': 'mp3'}
+
+
+def detect_platform(entry: str) -> str:
+    if entry.startswith(SPOTIFY_PREFIX):
+        return 'spotify'
+    host = urlparse(entry).netloc.lower().split(':')[0]
+    for platform, domains in _PLATFORM_HOSTS:
+        if any(host == domain or host.endswith('.' + domain) for domain in domains):
+            return platform
+    return 'universal'
+
+
+def resolve_route(entry: str, fmt: str = 'auto', platform: str = None):
+    """(plataforma, formato, descargador) para una entrada, o descargador None si no se soporta"""
+    platform = platform or detect_platform(entry)
+    fmt = _DEFAULT_FORMAT.get(platform, 'mp4') if fmt == 'auto' else fmt
+    return platform, fmt, _ROUTES.get((platform, fmt))
+
+
+def _create_downloader(kind):
+    # Imports diferidos: solo se exigen las dependencias de las plataformas usadas
+    if kind == 'youtube':
+        from downloaders.youtube import YouTubeDownloader
+        return YouTubeDownloader()
+    if kind == 'tiktok':
+        from downloaders.tiktok import TikTokDownloader
+        return TikTokDownloader()
+    if kind == 'instagram':
+        from downloaders.instagram import InstagramDownloader
+        return InstagramDownloader()
+    if kind == 'facebook':
+        from downloaders.facebook import FacebookDownloader
+        return FacebookDownloader()
+    if kind == 'twitter':
+        from downloaders.twitter import TwitterDownloader
+        return TwitterDownloader()
+    if kind == 'spotify':
+        from downloaders.spotify import SpotifyDownloader
+        return SpotifyDownloader()
+    from downloaders.universal import UniversalDownloader
+    return UniversalDownloader()
+
+
+class _Downloaders:
+    """Una instancia compartida por tipo de descargador, creada bajo demanda"""
+
+    def __init__(self, use_archive=True):
+        self.use_archive = use_archive
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind):
+        with self._lock:
+            if kind not in self._instances:
+                downloader = _create_downloader(kind)
+                downloader.use_archive = self.use_archive
+                self._instances[kind] = downloader
+            return self._instances[kind]
+
+
+class _Emitter:
+    """Escribe eventos JSON lines de forma atómica desde varios hilos"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({'event': event, **fields}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _progress_ratio(args):
+    """Normaliza los callbacks de progreso: YouTube envía ('42.0%', speed, eta), el resto 0.0-1.0"""
+    if not args:
+        return None
+    value = args[0]
+    if isinstance(value, str):
+        match = re.search(r'[\d.]+', value)
+        return float(match.group()) / 100 if match else None
+    return float(value)
+
+
+def _run_entry(downloaders, kind, entry, output_dir, progress_callback, title_callback):
+    """Etapa de red de una entrada. Devuelve (success, msg) o un Future si sigue en core.transcoder"""
+    downloader = downloaders.get(kind)
+
+    if kind == 'spotify':
+        query = entry[len(SPOTIFY_PREFIX):].strip() if entry.startswith(SPOTIFY_PREFIX) else entry
+        results = downloader.search_track(query)
+        if not results:
+            return False, "Sin resultados en YT Music"
+        track = results[0]
+        title_callback(f"{track['artist']} - {track['title']}")
+        return downloader.fetch_audio_with_tags(track, output_dir, progress_callback)
+
+    if kind == 'youtube':
+        future, _ = downloader.fetch_audio(entry, output_dir, progress_callback, title_callback)
+        return future if future is not None else (False, '')
+
+    return downloader.download_audio(entry, output_dir, progress_callback, title_callback)
+
+
+def run_batch(entries, output_dir, emitter, fmt='auto', platform=None,
+              concurrency=DEFAULT_CONCURRENCY, use_archive=True):
+    """Descarga las entradas con concurrencia acotada. Devuelve (exitosas, fallidas)"""
+    downloaders = _Downloaders(use_archive)
+    succeeded = failed = 0
+    pending = {}  # Future -> (index, entry)
+
+    def job(index, entry, kind):
+        last_report = [0.0]
+
+        def progress_callback(*args):
+            ratio = _progress_ratio(args)
+            now = time.monotonic()
+            if ratio is None or (now - last_report[0] < PROGRESS_INTERVAL and ratio < 1.0):
+                return
+            last_report[0] = now
+            emitter.emit('progress', index=index, url=entry, percent=round(ratio * 100, 1))
+
+        def title_callback(title):
+            # yt-dlp envía '-' al terminar la descarga
+            if title and title != '-':
+                emitter.emit('title', index=index, url=entry, title=title)
+
+        return _run_entry(downloaders, kind, entry, output_dir, progress_callback, title_callback)
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cli")
+    try:
+        for index, entry in enumerate(entries):
+            entry_platform, entry_format, kind = resolve_route(entry, fmt, platform)
+            emitter.emit('start', index=index, url=entry, platform=entry_platform, format=entry_format)
+            if kind is None:
+                failed += 1
+                emitter.emit('done', index=index, url=entry, ok=False,
+                             error=f"Formato {entry_format} no disponible para {entry_platform}")
+                continue
+            pending[pool.submit(job, index, entry, kind)] = (index, entry)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, entry = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = (False, str(e))
+
+                if isinstance(result, Future):
+                    # Red terminada: la conversión sigue en el pool de CPU
+                    emitter.emit('transcoding', index=index, url=entry)
+                    pending[result] = (index, entry)
+                    continue
+
+                success, msg = result
+                if success:
+                    succeeded += 1
+                    emitter.emit('done', index=index, url=entry, ok=True, title=msg)
+                else:
+                    failed += 1
+                    emitter.emit('done', index=index, url=entry, ok=False, error=msg or "La descarga falló")
+    except KeyboardInterrupt:
+        # No iniciar más trabajos; los que están en curso terminan por su cuenta
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    return succeeded, failed
+
+
+def read_entries(urls, input_path=None):
+    """URLs de la línea de comandos más las de un archivo ('-' = stdin)"""
+    lines = list(urls)
+    if input_path == '-':
+        lines += sys.stdin.read().splitlines()
+    elif input_path:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            lines += f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m novahub',
+        description="Nova Hub por lotes: descarga URLs sin interfaz gráfica y reporta JSON lines.",
+    )
+    parser.add_argument('urls', nargs='*', help="URLs o 'spotify:<búsqueda>'")
+    parser.add_argument('-i', '--input', metavar='ARCHIVO',
+                        help="Archivo con una entrada por línea ('-' para leer de stdin)")
+    parser.add_argument('-o', '--output', metavar='CARPETA', default='.',
+                        help="Carpeta de destino (se crea si no existe)")
+    parser.add_argument('-j', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Descargas simultáneas (1-{MAX_CONCURRENCY}, por defecto {DEFAULT_CONCURRENCY})")
+    parser.add_argument('-f', '--format', choices=('auto', 'mp3', 'mp4'), default='auto',
+                        help="auto = MP3 para YouTube/Spotify, MP4 para el resto")
+    parser.add_argument('-p', '--platform',
+                        choices=('youtube', 'spotify', 'tiktok', 'instagram', 'facebook', 'twitter', 'universal'),
+                        help="Forzar plataforma en lugar de detectarla por dominio")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="No consultar ni registrar el archivo de descargas")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        entries = read_entries(args.urls, args.input)
+    except OSError as e:
+        parser.error(f"No se pudo leer {args.input}: {e}")
+    if not entries:
+        parser.error("No hay URLs para descargar")
+    if not 1 <= args.concurrency <= MAX_CONCURRENCY:
+        parser.error(f"--concurrency debe estar entre 1 y {MAX_CONCURRENCY}")
+
+    output_dir = os.path.abspath(args.output)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # stdout queda reservado para los eventos; los print de los descargadores van a stderr
+    emitter = _Emitter(sys.stdout)
+    started = time.monotonic()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            succeeded, failed = run_batch(
+                entries, output_dir, emitter, fmt=args.format, platform=args.platform,
+                concurrency=args.concurrency, use_archive=not args.no_archive,
+            )
+    except KeyboardInterrupt:
+        emitter.emit('summary', total=len(entries), interrupted=True)
+        return EXIT_INTERRUPTED
+
+    emitter.emit('summary', total=len(entries), ok=succeeded, failed=failed,
+                 elapsed=round(time.monotonic() - started, 2))
+    return EXIT_OK if failed == 0 else EXIT_FAILED
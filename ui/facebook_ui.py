@@ -5,12 +5,13 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QThread, Signal, Slot
 from PySide6.QtGui import QFont, QPixmap, QImage
 import os
-import requests
-import time
 from datetime import datetime
 from threading import Lock
 
+from core.image_cache import fetch_image
 from ui.base_ui import PlatformUI
+from ui.images import AspectRatioLabel, PREVIEW_MAX_SIZE, decode_image
+from ui.progress import progress_channel
 from downloaders.facebook import FacebookDownloader
 
 # ===== PALETA =====
@@ -28,7 +29,7 @@ class FacebookDownloadThread(QThread):
     """Thread de descarga para Facebook"""
     progress_updated = Signal(int)  # progreso en porcentaje (0-100)
     info_updated = Signal(str, str, str, str, str, str, str)  # author, views, date, resolution, duration, size, description
-    preview_updated = Signal(bytes)  # thumbnail data
+    preview_updated = Signal(QImage, str)  # miniatura ya decodificada, url de origen
     console_message = Signal(str, str)  # message, status
     download_finished = Signal()
     
@@ -37,6 +38,8 @@ class FacebookDownloadThread(QThread):
         self.url = url
         self.output_path = output_path
         self.downloader = downloader
+        # Progreso con throttling hacia la GUI (ui.progress)
+        self._progress = progress_channel(self.progress_updated.emit)
         self.is_running = True
     
     def run(self):
@@ -68,22 +71,21 @@ class FacebookDownloadThread(QThread):
             self.info_updated.emit(author, "N/A", date_val, "N/A", duration_val, size, description)
             if thumbnail_url:
                 try:
-                    thumb_response = requests.get(thumbnail_url, timeout=10)
-                    if thumb_response.status_code == 200:
-                        self.preview_updated.emit(thumb_response.content)
+                    # Caché en disco: una miniatura ya vista no se vuelve a bajar
+                    thumb_data = fetch_image(thumbnail_url)
+                    if thumb_data:
+                        # Decodificar y reducir aquí, no en el hilo de la GUI
+                        self.preview_updated.emit(decode_image(thumb_data, PREVIEW_MAX_SIZE), thumbnail_url)
                 except:
                     pass
             
-            # Pausa de 1 segundos para ver la info (solicitado por user)
-            time.sleep(1)
-            
             # 3. Iniciar descarga real
             self.console_message.emit("↓ Descargando contenido...", "info")
             
             def progress_callback(progress_ratio):
                 # Recibimos un valor de 0.0 a 1.0
                 percent = int(progress_ratio * 100)
-                self.progress_updated.emit(percent)
+                self._progress(percent)
             
             success, title = self.downloader.download_audio(
                 self.url,
@@ -103,6 +105,7 @@ class FacebookDownloadThread(QThread):
             self.console_message.emit(f"✖ Error: {str(e)}", "error")
         
         finally:
+            self._progress.discard()
             self.download_finished.emit()
     
     def _format_views(self, views):
@@ -174,53 +177,6 @@ class FacebookDownloadThread(QThread):
             return "N/A"
 
 
-
-from PySide6.QtGui import QPainter, QPainterPath
-from PySide6.QtCore import QRectF
-
-class AspectRatioLabel(QLabel):
-    """Label que mantiene el aspect ratio de su contenido con bordes redondeados"""
-    def __init__(self, text="", parent=None):
-        super().__init__(text, parent)
-        self.setMinimumSize(1, 1)
-        self.setScaledContents(False) 
-        self.pixmap_original = None
-        self.setAlignment(Qt.AlignCenter)
-        self.radius = 14 # Mismo ratio global
-
-    def setPixmap(self, pixmap):
-        self.pixmap_original = pixmap
-        self.update_pixmap()
-
-    def resizeEvent(self, event):
-        self.update_pixmap()
-        super().resizeEvent(event)
-
-    def update_pixmap(self):
-        if self.pixmap_original and not self.pixmap_original.isNull():
-            scaled = self.pixmap_original.scaled(
-                self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            
-            # Crear un pixmap vacío transparente para dibujar el redondeado
-            rounded = QPixmap(scaled.size())
-            rounded.fill(Qt.transparent)
-            
-            painter = QPainter(rounded)
-            painter.setRenderHint(QPainter.Antialiasing)
-            path = QPainterPath()
-            path.addRoundedRect(
-                0, 0, scaled.width(), scaled.height(), 
-                self.radius, self.radius
-            )
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, scaled)
-            painter.end()
-            
-            super().setPixmap(rounded)
-        else:
-            pass
-
 class FacebookUI(PlatformUI):
     
     def __init__(self, parent_widget: QWidget, console_lock: Lock):
@@ -407,7 +363,7 @@ class FacebookUI(PlatformUI):
         preview_layout.addWidget(preview_title)
         
         # Label responsivo
-        self.preview_label = AspectRatioLabel("Sin vista previa")
+        self.preview_label = AspectRatioLabel("Sin vista previa", radius=RADIUS)
         self.preview_label.setFixedWidth(270) # Fix width as requested
         self.preview_label.setStyleSheet(f"background-color: {BG_PANEL}; border-radius: {RADIUS}px; color: {TEXT_SEC};")
         
@@ -561,14 +517,13 @@ class FacebookUI(PlatformUI):
         self.size_label.setText(size)
         self.description_label.setText(description)
     
-    @Slot(bytes)
-    def set_preview_image(self, image_data):
-        """Actualiza la imagen de preview desde datos binarios"""
+    @Slot(QImage, str)
+    def set_preview_image(self, image, url):
+        """Actualiza la imagen de preview (decodificada en el hilo de descarga)"""
         try:
-            pixmap = QPixmap()
-            if pixmap.loadFromData(image_data):
+            if not image.isNull():
                 # Usar AspectRatioLabel para mantener el ratio automáticamente
-                self.preview_label.setPixmap(pixmap)
+                self.preview_label.setImage(image, url)
             else:
                 self.preview_label.setText("Error al cargar imagen")
         except Exception as e:
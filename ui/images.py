@@ -0,0 +1,252 @@
+import threading
+from collections import OrderedDict
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QSize, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPainter, QPainterPath, QPixmap
+from PySide6.QtWidgets import QLabel
+
+from core.image_cache import fetch_image
+
+
+# Las imágenes se decodifican y reducen en los hilos de trabajo (QImage es
+# seguro fuera de la GUI); el hilo de la GUI solo convierte a QPixmap y, en
+# las vistas previas redimensionables, escala un original ya pequeño. Los
+# pixmaps escalados se guardan por (url, tamaño) para no repetir el trabajo
+# en cada resizeEvent ni al volver a buscar lo mismo. Las descargas de
+# portadas/miniaturas comparten un QThreadPool acotado (ImageService).
+PREVIEW_MAX_SIZE = QSize(640, 640)      # Vista previa de las plataformas (AspectRatioLabel)
+PIXMAP_CACHE_BYTES = 32 * 1024 * 1024
+
+# Descargas de imágenes simultáneas del servicio compartido (ImageService)
+IMAGE_WORKERS = 6
+IMAGE_TIMEOUT = 5
+
+
+def decode_image(data: bytes, max_size: QSize = None) -> QImage:
+    """Decodifica data reduciéndola a max_size (manteniendo el aspecto). Llamar desde un hilo de trabajo
+
+    Con JPEG el lector decodifica directamente a la escala reducida, sin
+    pasar por la imagen completa. Devuelve un QImage nulo si data no es válida.
+    """
+    if not data:
+        return QImage()
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    if max_size is not None:
+        size = reader.size()
+        if size.isValid() and (size.width() > max_size.width() or size.height() > max_size.height()):
+            reader.setScaledSize(size.scaled(max_size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class ScaledPixmapCache:
+    """LRU de pixmaps ya escalados, acotada por bytes. Solo se usa desde el hilo de la GUI"""
+
+    def __init__(self, max_bytes: int = PIXMAP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (url, ancho, alto, variante) -> QPixmap
+        self._bytes = 0
+
+    @staticmethod
+    def _key(url, size, variant):
+        return (url, size.width(), size.height(), variant)
+
+    @staticmethod
+    def _cost(pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    def get(self, url, size: QSize, variant: str = ''):
+        if not url:
+            return None
+        key = self._key(url, size, variant)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def put(self, url, size: QSize, pixmap, variant: str = ''):
+        if not url or pixmap is None or pixmap.isNull():
+            return
+        key = self._key(url, size, variant)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._cost(previous)
+        self._entries[key] = pixmap
+        self._bytes += self._cost(pixmap)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._cost(evicted)
+
+
+_pixmap_cache = None
+
+
+def get_pixmap_cache() -> ScaledPixmapCache:
+    global _pixmap_cache
+    if _pixmap_cache is None:
+        _pixmap_cache = ScaledPixmapCache()
+    return _pixmap_cache
+
+
+class AspectRatioLabel(QLabel):
+    """Label que mantiene el aspect ratio de su imagen (con bordes redondeados si radius > 0).
+
+    Los escalados se guardan en get_pixmap_cache() por URL de origen
+    (cache_key), así un resizeEvent o una vista previa repetida no vuelven a
+    escalar ni a redondear.
+    """
+
+    def __init__(self, text="", parent=None, radius=0):
+        super().__init__(text, parent)
+        self.setMinimumSize(1, 1)
+        self.setScaledContents(False)
+        self.pixmap_original = None
+        self.cache_key = None
+        self._shown_size = None
+        self.radius = radius
+        self.setAlignment(Qt.AlignCenter)
+
+    @property
+    def _variant(self) -> str:
+        return f"rounded{self.radius}" if self.radius else ''
+
+    def setPixmap(self, pixmap, cache_key=None):
+        self.pixmap_original = pixmap
+        self.cache_key = cache_key
+        self._shown_size = None
+        self.update_pixmap()
+
+    def setImage(self, image, cache_key=None):
+        """Imagen ya decodificada y reducida en un hilo de trabajo (decode_image)"""
+        self.setPixmap(QPixmap.fromImage(image), cache_key)
+
+    def resizeEvent(self, event):
+        self.update_pixmap()
+        super().resizeEvent(event)
+
+    def update_pixmap(self):
+        if not self.pixmap_original or self.pixmap_original.isNull():
+            return
+        size = self.size()
+        if (size.width(), size.height()) == self._shown_size:
+            return  # resizeEvent sin cambio real de tamaño
+        cache = get_pixmap_cache()
+        pixmap = cache.get(self.cache_key, size, self._variant)
+        if pixmap is None:
+            # Escalar al tamaño actual del widget manteniendo ratio
+            pixmap = self.pixmap_original.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            if self.radius:
+                pixmap = self._rounded(pixmap)
+            cache.put(self.cache_key, size, pixmap, self._variant)
+        self._shown_size = (size.width(), size.height())
+        super().setPixmap(pixmap)
+
+    def _rounded(self, scaled):
+        # Pixmap transparente con el escalado recortado a un rectángulo redondeado
+        rounded = QPixmap(scaled.size())
+        rounded.fill(Qt.transparent)
+        painter = QPainter(rounded)
+        painter.setRenderHint(QPainter.Antialiasing)
+        path = QPainterPath()
+        path.addRoundedRect(0, 0, scaled.width(), scaled.height(), self.radius, self.radius)
+        painter.setClipPath(path)
+        painter.drawPixmap(0, 0, scaled)
+        painter.end()
+        return rounded
+
+
+class _ImageTask(QRunnable):
+    """Baja (vía core.image_cache) y decodifica una imagen en el pool del servicio"""
+
+    def __init__(self, service, key):
+        super().__init__()
+        self.service = service
+        self.key = key
+
+    def run(self):
+        # Pedido cancelado mientras esperaba turno: no tocar la red
+        if not self.service._is_wanted(self.key):
+            return
+        url, width, height = self.key
+        try:
+            image = decode_image(fetch_image(url, timeout=IMAGE_TIMEOUT), QSize(width, height))
+        except Exception:
+            image = QImage()
+        self.service._loaded.emit(url, width, height, image)
+
+
+class ImageService(QObject):
+    """Carga de portadas y miniaturas sobre un QThreadPool acotado.
+
+    Los pedidos iguales (url + tamaño) en curso se agrupan en una sola
+    descarga, y cancel(owner) descarta los de una búsqueda o galería que ya
+    no está en pantalla. Los callbacks reciben el QImage (nulo si falló) en
+    el hilo de la GUI.
+    """
+
+    _loaded = Signal(str, int, int, QImage)
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_workers)
+        self._waiting = {}  # (url, ancho, alto) -> [(owner, callback)]
+        self._tasks = {}    # (url, ancho, alto) -> _ImageTask pendiente
+        self._lock = threading.Lock()
+        self._loaded.connect(self._deliver)
+
+    def request(self, url: str, size: QSize, callback, owner=None):
+        """Pide url reducida a size; callback(QImage) se llama en el hilo de la GUI"""
+        key = (url, size.width(), size.height())
+        with self._lock:
+            waiters = self._waiting.get(key)
+            if waiters is not None:
+                waiters.append((owner, callback))  # Ya en curso: compartir el resultado
+                return
+            self._waiting[key] = [(owner, callback)]
+            task = self._tasks[key] = _ImageTask(self, key)
+        self._pool.start(task)
+
+    def cancel(self, owner):
+        """Descarta los pedidos de owner; los que aún no empezaron salen del pool"""
+        with self._lock:
+            for key in list(self._waiting):
+                waiters = [w for w in self._waiting[key] if w[0] is not owner]
+                if waiters:
+                    self._waiting[key] = waiters
+                    continue
+                del self._waiting[key]
+                task = self._tasks.pop(key, None)
+                if task is not None:
+                    self._pool.tryTake(task)
+
+    def _is_wanted(self, key) -> bool:
+        with self._lock:
+            return key in self._waiting
+
+    def _deliver(self, url, width, height, image):
+        key = (url, width, height)
+        with self._lock:
+            waiters = self._waiting.pop(key, [])
+            self._tasks.pop(key, None)
+        for _, callback in waiters:
+            try:
+                callback(image)
+            except RuntimeError:
+                pass  # El widget destino ya fue destruido
+            except Exception as e:
+                print(f"⚠️ Error entregando imagen: {e}")
+
+
+_image_service = None
+
+
+def get_image_service() -> ImageService:
+    """Servicio de imágenes compartido (crear desde el hilo de la GUI)"""
+    global _image_service
+    if _image_service is None:
+        _image_service = ImageService()
+    return _image_service
@@ -3,15 +3,19 @@ from PySide6.QtWidgets import (
     QLabel, QPushButton, QPlainTextEdit, QLineEdit, QFrame, QFileDialog, QProgressBar, QStackedWidget,
     QScrollArea
 )
-from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QFont, QPixmap
+from PySide6.QtCore import Qt, QThread, Signal, Slot, QSize
+from PySide6.QtGui import QFont, QPixmap, QImage
 import os
-import requests
-import time
 from datetime import datetime
 from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 
+from core import transfer
+from core.http import get_session
+from core.image_cache import fetch_image, get_image_cache
 from ui.base_ui import PlatformUI
+from ui.images import AspectRatioLabel, PREVIEW_MAX_SIZE, decode_image, get_image_service, get_pixmap_cache
+from ui.progress import progress_channel
 from downloaders.instagram import InstagramDownloader
 
 # ===== PALETA REUTILIZADA =====
@@ -28,7 +32,7 @@ class InstagramDownloadThread(QThread):
     """Thread de descarga para Videos de Instagram"""
     progress_updated = Signal(int)
     info_updated = Signal(str, str, str, str, str, str, str) # author, views, date, resolution, duration, size, description
-    preview_updated = Signal(bytes)
+    preview_updated = Signal(QImage, str)  # miniatura ya decodificada, url de origen
     console_message = Signal(str, str)
     download_finished = Signal()
     
@@ -37,6 +41,8 @@ class InstagramDownloadThread(QThread):
         self.url = url
         self.output_path = output_path
         self.downloader = downloader
+        # Progreso con throttling hacia la GUI (ui.progress)
+        self._progress = progress_channel(self.progress_updated.emit)
     
     def run(self):
         try:
@@ -63,18 +69,19 @@ class InstagramDownloadThread(QThread):
             thumbnail_url = info.get('thumbnail')
             if thumbnail_url:
                 try:
-                    thumb_response = requests.get(thumbnail_url, timeout=10)
-                    if thumb_response.status_code == 200:
-                        self.preview_updated.emit(thumb_response.content)
+                    # Caché en disco: una miniatura ya vista no se vuelve a bajar
+                    thumb_data = fetch_image(thumbnail_url)
+                    if thumb_data:
+                        # Decodificar y reducir aquí, no en el hilo de la GUI
+                        self.preview_updated.emit(decode_image(thumb_data, PREVIEW_MAX_SIZE), thumbnail_url)
                 except:
                     pass
             
-            time.sleep(1)
             self.console_message.emit("↓ Descargando video...", "info")
             
             def progress_callback(progress_ratio):
                 percent = int(progress_ratio * 100)
-                self.progress_updated.emit(percent)
+                self._progress(percent)
                 
             success, title = self.downloader.download_audio(
                 self.url,
@@ -90,6 +97,7 @@ class InstagramDownloadThread(QThread):
         except Exception as e:
             self.console_message.emit(f"✖ Error: {str(e)}", "error")
         finally:
+            self._progress.discard()
             self.download_finished.emit()
 
     def _format_views(self, views):
@@ -150,6 +158,9 @@ class InstagramImageFetchThread(QThread):
             self.console_message.emit(f"✖ Error extracting images: {str(e)}", "error")
             self.fetch_finished.emit({})
 
+# Imágenes del carrusel que se descargan a la vez (keep-alive del pool HTTP compartido)
+IMAGE_DOWNLOAD_WORKERS = 4
+
 class InstagramImagesDownloadThread(QThread):
     """Thread para descargar masivamente una lista de imágenes"""
     progress_updated = Signal(int, int) # completed, total
@@ -160,33 +171,46 @@ class InstagramImagesDownloadThread(QThread):
         super().__init__()
         self.images = images_to_download
         self.output_path = output_path
+
+    def _save_image(self, img_data):
+        """Guarda una imagen (corre en el pool). Devuelve (ok, mensaje)"""
+        url = img_data['url']
+        filename = img_data['filename']
+        filepath = os.path.join(self.output_path, filename)
+
+        # La galería ya bajó esta URL (display_url, resolución completa) para la miniatura
+        try:
+            cached = get_image_cache().get(url)
+        except Exception:
+            cached = None
+
+        try:
+            if cached is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(cached)
+                return True, f"✓ Guardado: {filename}"
+
+            with get_session().get(url, stream=True, timeout=15) as response:
+                if response.status_code != 200:
+                    return False, f"✖ Error al descargar {filename}"
+                with open(filepath, 'wb', buffering=transfer.WRITE_BUFFER) as f:
+                    transfer.stream_response(response, f)
+            return True, f"✓ Guardado: {filename}"
+        except Exception as e:
+            return False, f"✖ Error de red con {filename}: {e}"
         
     def run(self):
         try:
             total = len(self.images)
             self.console_message.emit(f"↓ Iniciando descarga de {total} imágenes...", "info")
             
-            for index, img_data in enumerate(self.images):
-                url = img_data['url']
-                filename = img_data['filename']
-                filepath = os.path.join(self.output_path, filename)
-                
-                try:
-                    response = requests.get(url, stream=True, timeout=15)
-                    if response.status_code == 200:
-                        with open(filepath, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if chunk:
-                                    f.write(chunk)
-                        
-                        self.console_message.emit(f"✓ Guardado: {filename}", "success")
-                    else:
-                        self.console_message.emit(f"✖ Error al descargar {filename}", "error")
-                except Exception as e:
-                    self.console_message.emit(f"✖ Error de red con {filename}: {e}", "error")
-                
-                # Emitir progreso actualizando 1 a 1
-                self.progress_updated.emit(index + 1, total)
+            workers = max(1, min(IMAGE_DOWNLOAD_WORKERS, total))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ig-images") as pool:
+                # map entrega los resultados en el orden de la galería aunque terminen desordenados
+                for index, (ok, msg) in enumerate(pool.map(self._save_image, self.images)):
+                    self.console_message.emit(msg, "success" if ok else "error")
+                    # Emitir progreso actualizando 1 a 1
+                    self.progress_updated.emit(index + 1, total)
                 
             self.console_message.emit("★ Proceso de descarga finalizado.", "success")
         except Exception as e:
@@ -194,52 +218,15 @@ class InstagramImagesDownloadThread(QThread):
         finally:
             self.download_finished.emit()
 
-class AspectRatioLabel(QLabel):
-    def __init__(self, text="", parent=None):
-        super().__init__(text, parent)
-        self.setMinimumSize(1, 1)
-        self.setScaledContents(False) 
-        self.pixmap_original = None
-        self.setAlignment(Qt.AlignCenter)
-
-    def setPixmap(self, pixmap):
-        self.pixmap_original = pixmap
-        self.update_pixmap()
-
-    def resizeEvent(self, event):
-        self.update_pixmap()
-        super().resizeEvent(event)
-
-    def update_pixmap(self):
-        if self.pixmap_original and not self.pixmap_original.isNull():
-            scaled = self.pixmap_original.scaled(
-                self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            super().setPixmap(scaled)
 
-class ImageLoaderThread(QThread):
-    """Thread ligero para descargar miniaturas sin congelar la UI"""
-    finished = Signal(bytes)
-    
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
-        
-    def run(self):
-        try:
-            resp = requests.get(self.url, timeout=5)
-            if resp.status_code == 200:
-                self.finished.emit(resp.content)
-            else:
-                self.finished.emit(b"") # Error
-        except:
-            self.finished.emit(b"")
+# Miniatura de cada imagen del carrusel (ImageSelectButton mide 150x150)
+THUMB_SIZE = QSize(140, 140)
 
 class ImageSelectButton(QFrame):
     """Custom widget: A picture that acts like a toggle button"""
     toggled = Signal(bool, dict) # emite estado y la metadata de la imagen
     
-    def __init__(self, img_data):
+    def __init__(self, img_data, owner=None):
         super().__init__()
         self.img_data = img_data
         self.is_selected = True
@@ -254,17 +241,17 @@ class ImageSelectButton(QFrame):
         self.image_label = AspectRatioLabel("Cargando...")
         layout.addWidget(self.image_label)
         
-        # Iniciar thread asíncrono para la miniatura
-        self.loader_thread = ImageLoaderThread(self.img_data['url'])
-        self.loader_thread.finished.connect(self._on_image_loaded)
-        self.loader_thread.start()
-        
-    @Slot(bytes)
-    def _on_image_loaded(self, data):
-        if data:
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            self.image_label.setPixmap(pixmap)
+        # Miniatura desde el servicio de imágenes compartido (owner permite cancelarla)
+        cached = get_pixmap_cache().get(self.img_data['url'], THUMB_SIZE, 'thumb')
+        if cached is not None:
+            self.image_label.setPixmap(cached, self.img_data['url'])
+        else:
+            get_image_service().request(self.img_data['url'], THUMB_SIZE, self._on_image_loaded, owner=owner)
+        
+    def _on_image_loaded(self, image):
+        if not image.isNull():
+            get_pixmap_cache().put(self.img_data['url'], THUMB_SIZE, QPixmap.fromImage(image), 'thumb')
+            self.image_label.setImage(image, self.img_data['url'])
         else:
             self.image_label.setText("Error")
 
@@ -689,11 +676,10 @@ class InstagramUI(PlatformUI):
         self.lbl_size.setText(size)
         self.lbl_desc.setText(desc)
 
-    @Slot(bytes)
-    def update_preview(self, img_data):
-        pixmap = QPixmap()
-        if pixmap.loadFromData(img_data):
-            self.preview.setPixmap(pixmap)
+    @Slot(QImage, str)
+    def update_preview(self, image, url):
+        if not image.isNull():
+            self.preview.setImage(image, url)
 
     @Slot(str, str)
     def push_msg(self, msg, status):
@@ -769,6 +755,8 @@ class InstagramUI(PlatformUI):
         self.image_fetch_thread.start()
 
     def clear_gallery(self):
+        # Miniaturas de la galería anterior que aún no llegaron
+        get_image_service().cancel(self)
         self.fetched_images.clear()
         self.selected_images.clear()
         # Eliminar widgets del layout
@@ -804,7 +792,7 @@ class InstagramUI(PlatformUI):
                 current_row_layout.setAlignment(Qt.AlignLeft)
                 self.gallery_layout.addLayout(current_row_layout)
                 
-            btn = ImageSelectButton(img_data)
+            btn = ImageSelectButton(img_data, owner=self)
             btn.toggled.connect(self.on_image_toggled)
             current_row_layout.addWidget(btn)
         
@@ -1,20 +1,14 @@
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
+    QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, 
     QFrame, QLabel, QPushButton, QStackedWidget
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 from datetime import datetime
 from threading import Lock
+import importlib
 
-from ui.youtube_ui import YouTubeUI
-from ui.tiktok_ui import TikTokUI
-from ui.instagram_ui import InstagramUI
-from ui.qr_ui import QRUI
-from ui.facebook_ui import FacebookUI
-from ui.twitter_ui import TwitterUI
-from ui.universal_ui import UniversalUI
-from ui.spotify_ui import SpotifyUI
+from core import startup_profiler
 
 # ===== PALETA ORO VERDE =====
 BG_MAIN  = "#0E1116"
@@ -22,6 +16,21 @@ BG_PANEL = "#151A21"
 ACCENT   = "#3B5998"
 TEXT_SEC = "#A9B1D6"
 
+# Vistas por plataforma (orden del sidebar). El módulo se importa y la vista se
+# construye al seleccionarla por primera vez: yt-dlp, instaloader, ytmusicapi,
+# mutagen, qrcode y Pillow no se cargan antes de mostrar la ventana.
+PLATFORMS = {
+    "Spotify": ("ui.spotify_ui", "SpotifyUI"),
+    "YouTube": ("ui.youtube_ui", "YouTubeUI"),
+    "Facebook": ("ui.facebook_ui", "FacebookUI"),
+    "X (Twitter)": ("ui.twitter_ui", "TwitterUI"),
+    "TikTok": ("ui.tiktok_ui", "TikTokUI"),
+    "Instagram": ("ui.instagram_ui", "InstagramUI"),
+    "Universal": ("ui.universal_ui", "UniversalUI"),
+    "QR": ("ui.qr_ui", "QRUI"),
+}
+DEFAULT_PLATFORM = "Spotify"
+
 
 class NovaHub(QMainWindow):
 
@@ -33,7 +42,7 @@ class NovaHub(QMainWindow):
         self.setMinimumSize(1180, 700)
 
         self.console_lock = Lock()
-        self.current_platform = "YouTube"
+        self.current_platform = DEFAULT_PLATFORM
         
         # Instancias de UIs
         self.platform_uis = {}
@@ -64,9 +73,7 @@ class NovaHub(QMainWindow):
 
         # Crear botones dinámicamente
         self.platform_buttons = {}
-        platforms_list = ["Spotify", "YouTube", "Facebook", "X (Twitter)", "TikTok", "Instagram", "Universal", "QR"]
-        
-        for platform_name in platforms_list:
+        for platform_name in PLATFORMS:
             btn = QPushButton(f"⁕  {platform_name}")
             btn.setFixedHeight(38)
             btn.setFont(QFont("Segoe UI", 11))
@@ -94,38 +101,7 @@ class NovaHub(QMainWindow):
         # ================== CONTENT AREA ==================
         self.content_widget = QStackedWidget()
 
-        # Construir UIs
-        self.platform_uis["YouTube"] = YouTubeUI(self.content_widget, self.console_lock)
-        self.platform_uis["YouTube"].build()
-        self.content_widget.addWidget(self.platform_uis["YouTube"])
-        
-        self.platform_uis["TikTok"] = TikTokUI(self.content_widget, self.console_lock)
-        self.platform_uis["TikTok"].build()
-        self.content_widget.addWidget(self.platform_uis["TikTok"])
-
-        self.platform_uis["Facebook"] = FacebookUI(self.content_widget, self.console_lock)
-        self.platform_uis["Facebook"].build()
-        self.content_widget.addWidget(self.platform_uis["Facebook"])
-
-        self.platform_uis["X (Twitter)"] = TwitterUI(self.content_widget, self.console_lock)
-        self.platform_uis["X (Twitter)"].build()
-        self.content_widget.addWidget(self.platform_uis["X (Twitter)"])
-
-        self.platform_uis["Instagram"] = InstagramUI(self.content_widget, self.console_lock)
-        self.platform_uis["Instagram"].build()
-        self.content_widget.addWidget(self.platform_uis["Instagram"])
-
-        self.platform_uis["Universal"] = UniversalUI(self.content_widget, self.console_lock)
-        self.platform_uis["Universal"].build()
-        self.content_widget.addWidget(self.platform_uis["Universal"])
-        
-        self.platform_uis["Spotify"] = SpotifyUI(self.content_widget, self.console_lock)
-        self.platform_uis["Spotify"].build()
-        self.content_widget.addWidget(self.platform_uis["Spotify"])
-
-        self.platform_uis["QR"] = QRUI(self.content_widget, self.console_lock)
-        self.platform_uis["QR"].build()
-        self.content_widget.addWidget(self.platform_uis["QR"])
+        # Las vistas se construyen al seleccionarlas por primera vez (set_platform)
 
         # Agregar al layout principal
         main_layout.addWidget(sidebar)
@@ -134,8 +110,15 @@ class NovaHub(QMainWindow):
         # Aplicar estilos
         self.apply_styles()
 
-        # Mostrar Spotify por defecto
-        self.set_platform("Spotify")
+        # Mostrar Spotify por defecto. Se construye ya con el event loop corriendo,
+        # así la ventana aparece antes de cargar la primera vista
+        self.highlight_platform(DEFAULT_PLATFORM)
+        QTimer.singleShot(0, self._show_default_platform)
+
+    def _show_default_platform(self):
+        self.set_platform(DEFAULT_PLATFORM)
+        # Con el perfil de arranque activo: reporte + JSON (core/startup_profiler.py)
+        startup_profiler.finish()
 
     def apply_styles(self):
         """Aplica los estilos QSS a la ventana"""
@@ -176,14 +159,43 @@ class NovaHub(QMainWindow):
             }}
         """)
 
+    def get_platform_ui(self, platform_name: str):
+        """Vista de la plataforma; la importa y construye la primera vez"""
+        platform_ui = self.platform_uis.get(platform_name)
+        if platform_ui is not None or platform_name not in PLATFORMS:
+            return platform_ui
+        
+        module_name, class_name = PLATFORMS[platform_name]
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            # import_module no pasa por __import__: se mide como fase
+            with startup_profiler.phase(f"import {module_name}"):
+                module = importlib.import_module(module_name)
+            with startup_profiler.phase(f"{class_name}()"):
+                platform_ui = getattr(module, class_name)(self.content_widget, self.console_lock)
+            with startup_profiler.phase(f"{class_name}.build()"):
+                platform_ui.build()
+        except Exception as e:
+            print(f"✖ No se pudo cargar la vista {platform_name}: {e}")
+            return None
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        self.content_widget.addWidget(platform_ui)
+        self.platform_uis[platform_name] = platform_ui
+        return platform_ui
+
     def set_platform(self, platform_name: str):
         """Cambia la plataforma activa"""
+        platform_ui = self.get_platform_ui(platform_name)
+        if platform_ui is None:
+            return
+        
         # Cambiar plataforma
         self.current_platform = platform_name
         
         # Mostrar nueva plataforma
-        if platform_name in self.platform_uis:
-            self.content_widget.setCurrentWidget(self.platform_uis[platform_name])
+        self.content_widget.setCurrentWidget(platform_ui)
 
         # Destacar botón
         self.highlight_platform(platform_name)
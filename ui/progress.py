@@ -0,0 +1,103 @@
+import threading
+
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+
+# Los hooks de progreso de yt-dlp/transfer se disparan por cada fragmento. En vez
+# de convertir cada uno en una señal Qt entre hilos, los hilos dejan el último
+# valor por trabajo en un dict y un QTimer del hilo de la GUI lo entrega a
+# FLUSH_INTERVAL_MS (10 Hz). El timer solo corre mientras hay actualizaciones.
+FLUSH_INTERVAL_MS = 100
+
+
+class ProgressChannel:
+    """Destino de progreso de un hilo: se llama como la señal/función que envuelve"""
+
+    def __init__(self, aggregator, fn):
+        self._aggregator = aggregator
+        self.fn = fn
+
+    def __call__(self, *args, key=None):
+        """Publica args para key; solo el último valor por key llega a la UI"""
+        self._aggregator._post(self, key, args)
+
+    def discard(self, key=None):
+        """Descarta lo pendiente (todas las keys si key es None).
+
+        Llamar antes de emitir una señal de fin para que un progreso atrasado no
+        llegue después de ella.
+        """
+        self._aggregator._discard(self, key)
+
+
+class ProgressAggregator(QObject):
+    """Agrupa actualizaciones de progreso de varios hilos y las entrega en la GUI"""
+
+    _wake = Signal()
+
+    def __init__(self, interval_ms: int = FLUSH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self._pending = {}  # (channel, key) -> args
+        self._lock = threading.Lock()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        # Emitido desde cualquier hilo: llega encolado al hilo de la GUI
+        self._wake.connect(self._start)
+
+    def channel(self, fn) -> ProgressChannel:
+        return ProgressChannel(self, fn)
+
+    def _post(self, channel, key, args):
+        with self._lock:
+            wake = not self._pending
+            self._pending[(channel, key)] = args
+        if wake:
+            self._wake.emit()
+
+    def _discard(self, channel, key):
+        with self._lock:
+            if key is not None:
+                self._pending.pop((channel, key), None)
+            else:
+                for entry in [e for e in self._pending if e[0] is channel]:
+                    del self._pending[entry]
+
+    def _start(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Entrega lo pendiente (hilo de la GUI)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            self._timer.stop()
+            return
+        for (channel, _), args in pending.items():
+            try:
+                channel.fn(*args)
+            except Exception as e:
+                print(f"⚠️ Error entregando progreso: {e}")
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator() -> ProgressAggregator:
+    """Agregador compartido de la aplicación (vive en el hilo de la GUI)"""
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = ProgressAggregator()
+            app = QCoreApplication.instance()
+            if app is not None and _aggregator.thread() is not app.thread():
+                _aggregator.moveToThread(app.thread())
+        return _aggregator
+
+
+def progress_channel(fn) -> ProgressChannel:
+    """Canal de progreso con throttling hacia fn (normalmente signal.emit)"""
+    return get_aggregator().channel(fn)
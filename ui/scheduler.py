@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+
+from PySide6.QtCore import QObject, Signal
+
+from ui.progress import progress_channel
+
+
+# Prioridades: menor número = se atiende antes. A igual prioridad se respeta FIFO.
+PRIORITY_HIGH = -10
+PRIORITY_NORMAL = 0
+
+
+class DownloadScheduler(QObject):
+    """Planificador de descargas con concurrencia acotada.
+
+    Mantiene un número fijo de workers reutilizables que toman trabajos de una
+    cola con prioridad (FIFO a igual prioridad). Cada trabajo es un callable
+    que recibe un progress_callback (0.0-1.0) y devuelve (success, msg).
+    Los workers no guardan referencias a trabajos terminados.
+
+    Si un trabajo devuelve un Future (p. ej. la etapa de red ya terminó y la
+    conversión quedó en core.transcoder), el slot se libera de inmediato y
+    job_finished se emite cuando el Future se resuelve.
+    """
+    job_started = Signal(int)             # job_id
+    job_deferred = Signal(int)            # job_id (etapa de red terminada, sigue en CPU)
+    job_progress = Signal(int, int)       # job_id, progreso (0-100)
+    job_finished = Signal(int, bool, str) # job_id, success, msg
+
+    def __init__(self, max_concurrency=3, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._heap = []
+        self._waiting = {}
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._max_concurrency = max(1, max_concurrency)
+        self._running = 0
+        self._paused = False
+        self._shutdown = False
+        self._workers = []
+        # job_progress llega a la GUI agrupado por job_id a 10 Hz (ui.progress)
+        self._progress = progress_channel(self.job_progress.emit)
+        self._spawn_workers()
+
+    # ------------------------------------------------------------------ API
+
+    def submit(self, job, priority=PRIORITY_NORMAL) -> int:
+        """Encola un trabajo y devuelve su job_id"""
+        with self._cond:
+            job_id = next(self._ids)
+            self._push(job_id, job, priority)
+            self._cond.notify()
+        return job_id
+
+    def prioritize(self, job_id, priority=PRIORITY_HIGH) -> bool:
+        """Mueve un trabajo en espera al frente de la cola"""
+        with self._cond:
+            entry = self._waiting.get(job_id)
+            if entry is None:
+                return False
+            # Invalidar la entrada vieja del heap y volver a insertarla
+            job = entry[3]
+            entry[3] = None
+            self._push(job_id, job, priority)
+            self._cond.notify()
+        return True
+
+    def cancel(self, job_id) -> bool:
+        """Descarta un trabajo que todavía no empezó"""
+        with self._cond:
+            entry = self._waiting.pop(job_id, None)
+            if entry is None:
+                return False
+            entry[3] = None
+        return True
+
+    def pause(self):
+        """Deja de iniciar trabajos nuevos (los que corren terminan normalmente)"""
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def set_max_concurrency(self, value: int):
+        with self._cond:
+            self._max_concurrency = max(1, int(value))
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._waiting)
+
+    def running_count(self) -> int:
+        with self._cond:
+            return self._running
+
+    def shutdown(self):
+        """Descarta la cola pendiente y libera los workers al terminar su trabajo actual"""
+        with self._cond:
+            self._shutdown = True
+            self._heap.clear()
+            self._waiting.clear()
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------ internals
+
+    def _push(self, job_id, job, priority):
+        entry = [priority, next(self._seq), job_id, job]
+        self._waiting[job_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _spawn_workers(self):
+        # Los workers se reutilizan: solo se crean los que falten para el máximo
+        while len(self._workers) < self._max_concurrency:
+            worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        """Bloquea hasta que haya un trabajo disponible y un slot libre"""
+        with self._cond:
+            while True:
+                if self._shutdown:
+                    return None, None
+                if not self._paused and self._running < self._max_concurrency:
+                    while self._heap and self._heap[0][3] is None:
+                        heapq.heappop(self._heap)
+                    if self._heap:
+                        _, _, job_id, job = heapq.heappop(self._heap)
+                        del self._waiting[job_id]
+                        self._running += 1
+                        return job_id, job
+                self._cond.wait()
+
+    def _worker_loop(self):
+        while True:
+            job_id, job = self._next_job()
+            if job is None:
+                return
+
+            self.job_started.emit(job_id)
+
+            def progress_callback(progress_ratio, job_id=job_id):
+                self._progress(job_id, int(progress_ratio * 100), key=job_id)
+
+            try:
+                result = job(progress_callback)
+            except Exception as e:
+                result = (False, str(e))
+            # Soltar la referencia antes de esperar el siguiente trabajo
+            job = None
+
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+            # Un progreso atrasado no debe pisar el estado final de la fila
+            self._progress.discard(job_id)
+            if isinstance(result, Future):
+                self.job_deferred.emit(job_id)
+                result.add_done_callback(
+                    lambda future, job_id=job_id: self._emit_future_result(job_id, future)
+                )
+            else:
+                success, msg = result
+                self.job_finished.emit(job_id, success, msg)
+
+    def _emit_future_result(self, job_id, future):
+        try:
+            success, msg = future.result()
+        except Exception as e:
+            success, msg = False, str(e)
+        self.job_finished.emit(job_id, success, msg)
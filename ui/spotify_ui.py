@@ -1,18 +1,18 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QFrame, QFileDialog, QProgressBar,
-    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QMenu
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QMenu, QComboBox
 )
 from PySide6.QtCore import Qt, QThread, Signal, Slot, QSize
 from PySide6.QtGui import QFont, QPixmap, QIcon, QAction
 from threading import Lock
 import os
-import requests
 import io
 import concurrent.futures
 
 from ui.base_ui import PlatformUI
-from downloaders.spotify import SpotifyDownloader
+from ui.images import get_image_service, get_pixmap_cache
+from ui.scheduler import DownloadScheduler
 
 # ===== PALETA ORO VERDE =====
 BG_MAIN  = "#0E1116"
@@ -24,32 +24,26 @@ TEXT_MAIN = "#FFFFFF"
 ERROR    = "#F7768E"
 RADIUS   = 14
 
-class CoverLoaderThread(QThread):
-    cover_loaded = Signal(int, bytes) # fila_index, image_bytes
-    def __init__(self, row_index, url):
-        super().__init__()
-        self.row_index = row_index
-        self.url = url
-    def run(self):
-        try:
-            r = requests.get(self.url, timeout=5)
-            if r.status_code == 200:
-                self.cover_loaded.emit(self.row_index, r.content)
-        except:
-            pass
+# Descargas simultáneas (yt-dlp + ffmpeg) permitidas por defecto en la cola
+DEFAULT_QUEUE_CONCURRENCY = 3
+MAX_QUEUE_CONCURRENCY = 8
+
+# Portada de cada fila de resultados
+COVER_SIZE = QSize(50, 50)
 
 class SpotifySearchThread(QThread):
     results_ready = Signal(list)
     error_occurred = Signal(str)
     
-    def __init__(self, downloader, query):
+    def __init__(self, get_downloader, query):
         super().__init__()
-        self.downloader = downloader
+        # Callable: la primera búsqueda crea el SpotifyDownloader (YTMusic) en este hilo
+        self.get_downloader = get_downloader
         self.query = query
         
     def run(self):
         try:
-            results = self.downloader.search_track(self.query)
+            results = self.get_downloader().search_track(self.query)
             if results:
                 self.results_ready.emit(results)
             else:
@@ -57,42 +51,66 @@ class SpotifySearchThread(QThread):
         except Exception as e:
             self.error_occurred.emit(str(e))
 
-class SpotifyWorkerThread(QThread):
-    """
-    Ejecuta un trabajo de la cola y reporta progreso para ESA fila
-    """
-    progress = Signal(int, int) # row_idx_queue, progress_val
-    finished = Signal(int, bool, str) # row_idx_queue, success, output_msg
-    
-    def __init__(self, row_idx, track_data, output_path, downloader):
+class SpotifyImportThread(QThread):
+    """Empareja una lista importada y entrega cada pista apenas se resuelve"""
+    track_matched = Signal(dict)
+    track_unmatched = Signal(str)
+    import_finished = Signal(int, int, int)  # emparejadas, sin coincidencia, canceladas
+    error_occurred = Signal(str)
+
+    def __init__(self, get_downloader, source):
         super().__init__()
-        self.row_idx = row_idx
-        self.track_data = track_data
-        self.output_path = output_path
-        self.downloader = downloader
-        
+        self.get_downloader = get_downloader
+        self.source = source
+        self.is_running = True
+
     def run(self):
-        def cb(progress_ratio):
-            self.progress.emit(self.row_idx, int(progress_ratio*100))
-            
         try:
-            success, msg = self.downloader.download_audio_with_tags(
-                self.track_data, self.output_path, progress_callback=cb
+            matched, unmatched, cancelled = self.get_downloader().import_tracks(
+                self.source, on_track=self._on_track, should_stop=lambda: not self.is_running
             )
-            self.finished.emit(self.row_idx, success, msg)
+            self.import_finished.emit(matched, unmatched, cancelled)
         except Exception as e:
-            self.finished.emit(self.row_idx, False, str(e))
+            self.error_occurred.emit(str(e))
+
+    def _on_track(self, wanted, track, score):
+        if track:
+            self.track_matched.emit(track)
+        else:
+            self.track_unmatched.emit(f"{wanted.get('artist', '')} - {wanted['title']}".strip(' -'))
+
+    def stop(self):
+        """Las búsquedas en curso terminan; las pendientes se descartan"""
+        self.is_running = False
 
 class SpotifyUI(PlatformUI):
     def __init__(self, parent_widget: QWidget, console_lock: Lock):
         super().__init__(parent_widget, "Spotify")
         self.console_lock = console_lock
-        self.downloader = SpotifyDownloader()
+        # SpotifyDownloader (ytmusicapi, mutagen, yt-dlp) se crea en la primera búsqueda
+        self._downloader = None
+        self._downloader_lock = Lock()
         self.current_results = []
         self.download_queue = []
-        self.active_workers = []
-        self.cover_threads = []
-        
+        self.queue_rows = {}  # job_id -> fila de la tabla de cola
+        self.import_thread = None
+        self._import_counts = [0, 0]  # emparejadas, sin coincidencia
+        
+        # Planificador compartido: concurrencia acotada y workers reutilizables
+        self.scheduler = DownloadScheduler(DEFAULT_QUEUE_CONCURRENCY, self)
+        self.scheduler.job_started.connect(self.on_queue_started)
+        self.scheduler.job_progress.connect(self.update_queue_progress)
+        self.scheduler.job_deferred.connect(self.on_queue_transcoding)
+        self.scheduler.job_finished.connect(self.on_queue_finished)
+        
+    def get_downloader(self):
+        """SpotifyDownloader compartido, creado bajo demanda (desde cualquier hilo)"""
+        with self._downloader_lock:
+            if self._downloader is None:
+                from downloaders.spotify import SpotifyDownloader
+                self._downloader = SpotifyDownloader()
+            return self._downloader
+    
     def build(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -122,6 +140,19 @@ class SpotifyUI(PlatformUI):
         self.btn_search.clicked.connect(self.perform_search)
         search_box.addWidget(self.btn_search)
         
+        self.btn_import = QPushButton("Importar")
+        self.btn_import.setFont(QFont("Segoe UI", 10))
+        self.btn_import.setFixedSize(100, 40)
+        self.btn_import.setProperty("secondary", "true")
+        self.btn_import.setCursor(Qt.PointingHandCursor)
+        self.btn_import.setToolTip(
+            "Importa una playlist o álbum completo a la cola:\n"
+            "• ID o enlace de playlist/álbum de YT Music escrito en el buscador\n"
+            "• o un archivo CSV (exportación de Spotify) / TXT con 'Artista - Título' por línea"
+        )
+        self.btn_import.clicked.connect(self.start_import)
+        search_box.addWidget(self.btn_import)
+        
         main_layout.addLayout(search_box)
         
         # Destino Box
@@ -183,9 +214,32 @@ class SpotifyUI(PlatformUI):
         
         # --- RIGHT: Cola de Descargas
         right_panel = QVBoxLayout()
+        queue_header = QHBoxLayout()
         lbl_queue = QLabel("Cola Activa")
         lbl_queue.setFont(QFont("Segoe UI", 12, QFont.Bold))
-        right_panel.addWidget(lbl_queue)
+        queue_header.addWidget(lbl_queue)
+        queue_header.addStretch()
+        
+        lbl_parallel = QLabel("Simultáneas:")
+        queue_header.addWidget(lbl_parallel)
+        
+        self.parallel_combo = QComboBox()
+        self.parallel_combo.addItems([str(n) for n in range(1, MAX_QUEUE_CONCURRENCY + 1)])
+        self.parallel_combo.setCurrentText(str(DEFAULT_QUEUE_CONCURRENCY))
+        self.parallel_combo.setFixedSize(60, 30)
+        self.parallel_combo.currentTextChanged.connect(
+            lambda value: self.scheduler.set_max_concurrency(int(value))
+        )
+        queue_header.addWidget(self.parallel_combo)
+        
+        self.btn_pause = QPushButton("Pausar")
+        self.btn_pause.setFont(QFont("Segoe UI", 10))
+        self.btn_pause.setFixedSize(90, 30)
+        self.btn_pause.setProperty("secondary", "true")
+        self.btn_pause.setCursor(Qt.PointingHandCursor)
+        self.btn_pause.clicked.connect(self.toggle_pause)
+        queue_header.addWidget(self.btn_pause)
+        right_panel.addLayout(queue_header)
         
         queue_frame = QFrame()
         queue_frame.setStyleSheet(f"QFrame {{ background-color: {BG_PANEL}; border-radius: {RADIUS}px; }}")
@@ -196,8 +250,10 @@ class SpotifyUI(PlatformUI):
         self.table_queue.setHorizontalHeaderLabels(["Track", "Progreso", "Estado"])
         self.table_queue.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table_queue.setColumnWidth(1, 100)
-        self.table_queue.setColumnWidth(2, 60)
+        self.table_queue.setColumnWidth(2, 90)
         self.table_queue.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_queue.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table_queue.customContextMenuRequested.connect(self.show_queue_menu)
         self.table_queue.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table_queue.verticalHeader().setVisible(False)
         self.table_queue.setStyleSheet("""
@@ -237,6 +293,10 @@ class SpotifyUI(PlatformUI):
             QPushButton:hover {{ background-color: #6487E5; }}
             QPushButton[secondary="true"] {{ background-color: #1C2230; }}
             QPushButton[secondary="true"]:hover {{ background-color: #252B3A; }}
+            QComboBox {{ background-color: {BG_PANEL}; border: none; border-radius: 8px; padding: 0 10px; color: white; }}
+            QComboBox QAbstractItemView {{ background-color: {BG_PANEL}; color: white; selection-background-color: {ACCENT}; outline: none; }}
+            QMenu {{ background-color: {BG_PANEL}; color: white; border: 1px solid #1f2536; }}
+            QMenu::item:selected {{ background-color: #1C2230; }}
             QProgressBar {{ background-color: transparent; border: 1px solid #333; text-align: center; color: white; border-radius: 4px; }}
             QProgressBar::chunk {{ background-color: {SUCCESS}; border-radius: 4px; }}
             
@@ -286,7 +346,7 @@ class SpotifyUI(PlatformUI):
         self.status_lbl.setText("Buscando en Spotify...")
         self.search_input.setEnabled(False)
         
-        self.search_thread = SpotifySearchThread(self.downloader, query)
+        self.search_thread = SpotifySearchThread(self.get_downloader, query)
         self.search_thread.results_ready.connect(self.on_search_results)
         self.search_thread.error_occurred.connect(self.on_search_error)
         self.search_thread.start()
@@ -295,7 +355,8 @@ class SpotifyUI(PlatformUI):
     def on_search_results(self, results):
         self.current_results = results
         self.table_res.setRowCount(len(results))
-        self.cover_threads.clear()
+        # Las portadas de la búsqueda anterior que aún no llegaron ya no hacen falta
+        get_image_service().cancel(self)
         
         for i, track in enumerate(results):
             # 0. Portada (Icono)
@@ -304,12 +365,16 @@ class SpotifyUI(PlatformUI):
             lbl_cover.setStyleSheet("background-color: #222; border-radius: 4px;")
             self.table_res.setCellWidget(i, 0, lbl_cover)
             
-            # Subproceso para cargar portada sin congelar
-            if track.get('cover_url'):
-                th = CoverLoaderThread(i, track['cover_url'])
-                th.cover_loaded.connect(self.inject_cover)
-                self.cover_threads.append(th)
-                th.start()
+            # Portada desde el servicio de imágenes (o directa si ya está escalada en memoria)
+            cached = get_pixmap_cache().get(track.get('cover_url'), COVER_SIZE)
+            if cached is not None:
+                lbl_cover.setPixmap(cached)
+            elif track.get('cover_url'):
+                # La misma portada 1080px que luego se incrusta en el MP3, reducida en el pool
+                url = track['cover_url']
+                get_image_service().request(
+                    url, COVER_SIZE, lambda image, i=i, url=url: self.inject_cover(i, url, image), owner=self
+                )
                 
             # 1. Canción
             item_title = QTableWidgetItem(track['title'])
@@ -347,14 +412,18 @@ class SpotifyUI(PlatformUI):
         self.btn_search.setEnabled(True)
         self.search_input.setEnabled(True)
         
-    @Slot(int, bytes)
-    def inject_cover(self, row_idx, image_data):
+    def inject_cover(self, row_idx, url, image):
+        if image.isNull():
+            return
         try:
+            pixmap = QPixmap.fromImage(image)
+            get_pixmap_cache().put(url, COVER_SIZE, pixmap)
+            # La fila pudo cambiar con una búsqueda nueva
+            if row_idx >= len(self.current_results) or self.current_results[row_idx].get('cover_url') != url:
+                return
             lbl = self.table_res.cellWidget(row_idx, 0)
             if lbl:
-                pixmap = QPixmap()
-                pixmap.loadFromData(image_data)
-                lbl.setPixmap(pixmap.scaled(50, 50, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                lbl.setPixmap(pixmap)
         except:
             pass
 
@@ -370,7 +439,12 @@ class SpotifyUI(PlatformUI):
         if not out_path or not os.path.exists(out_path):
             self.status_lbl.setText("Directorio inválido.")
             return
-            
+        
+        self.enqueue_track(track, out_path)
+        self.status_lbl.setText(f"Añadido a cola: {track['title']}")
+    
+    def enqueue_track(self, track, out_path):
+        """Añade una fila a la cola y encola la descarga en el planificador"""
         # Añadir al UI de Cola
         row_idx = self.table_queue.rowCount()
         self.table_queue.insertRow(row_idx)
@@ -387,33 +461,147 @@ class SpotifyUI(PlatformUI):
         self.table_queue.setCellWidget(row_idx, 1, bar)
         
         # Estado label
-        lbl_status = QLabel("...")
+        lbl_status = QLabel("En espera")
         lbl_status.setAlignment(Qt.AlignCenter)
         self.table_queue.setCellWidget(row_idx, 2, lbl_status)
         
-        # Iniciar Worker en plano de fondo (Descarga Independiente y Simultánea)
-        worker = SpotifyWorkerThread(row_idx, track, out_path, self.downloader)
-        worker.progress.connect(self.update_queue_progress)
-        worker.finished.connect(self.on_queue_finished)
+        # Encolar en el planificador (se ejecuta cuando haya un slot libre).
+        # El slot solo cubre la descarga; la conversión sigue en el pool de CPU.
+        def job(progress_callback, track=track, out_path=out_path):
+            return self.get_downloader().fetch_audio_with_tags(
+                track, out_path, progress_callback=progress_callback
+            )
+        
+        job_id = self.scheduler.submit(job)
+        self.queue_rows[job_id] = row_idx
+    
+    def start_import(self):
+        """Importa una playlist/álbum de YT Music (buscador) o un archivo CSV/TXT a la cola"""
+        if self.import_thread is not None and self.import_thread.isRunning():
+            self.import_thread.stop()
+            self.status_lbl.setText("Cancelando importación: las búsquedas en curso terminarán.")
+            return
         
-        self.active_workers.append(worker)
-        worker.start()
+        out_path = self.path.text()
+        if not out_path or not os.path.exists(out_path):
+            self.status_lbl.setText("Directorio inválido.")
+            return
         
-        self.status_lbl.setText(f"Añadido a cola: {track['title']}")
+        from downloaders.spotify import ytmusic_list_id
+        source = self.search_input.text().strip()
+        if not ytmusic_list_id(source):
+            source, _ = QFileDialog.getOpenFileName(
+                self, "Importar lista de pistas", "", "Listas de pistas (*.csv *.txt);;Todos los archivos (*)"
+            )
+            if not source:
+                return
+        
+        self._import_counts = [0, 0]
+        self._import_out_path = out_path
+        self.btn_import.setText("Cancelar")
+        self.status_lbl.setText("Importando: emparejando pistas en YT Music...")
+        
+        self.import_thread = SpotifyImportThread(self.get_downloader, source)
+        self.import_thread.track_matched.connect(self.on_import_matched)
+        self.import_thread.track_unmatched.connect(self.on_import_unmatched)
+        self.import_thread.import_finished.connect(self.on_import_finished)
+        self.import_thread.error_occurred.connect(self.on_import_error)
+        self.import_thread.finished.connect(lambda: self.btn_import.setText("Importar"))
+        self.import_thread.start()
+    
+    def _import_status(self):
+        matched, unmatched = self._import_counts
+        return f"{matched} en cola, {unmatched} sin coincidencia"
+    
+    @Slot(dict)
+    def on_import_matched(self, track):
+        # Directo al planificador: las descargas empiezan mientras sigue el emparejado
+        self._import_counts[0] += 1
+        self.enqueue_track(track, self._import_out_path)
+        self.status_lbl.setText(f"Importando: {self._import_status()}")
+    
+    @Slot(str)
+    def on_import_unmatched(self, name):
+        self._import_counts[1] += 1
+        print(f"✖ Sin coincidencia en YT Music: {name}")
+        self.status_lbl.setText(f"Importando: {self._import_status()}")
+    
+    @Slot(int, int, int)
+    def on_import_finished(self, matched, unmatched, cancelled):
+        if cancelled:
+            self.status_lbl.setText(f"Importación cancelada: {self._import_status()}, {cancelled} sin buscar.")
+        else:
+            self.status_lbl.setText(f"Importación terminada: {self._import_status()}.")
+    
+    @Slot(str)
+    def on_import_error(self, err_msg):
+        self.status_lbl.setText(f"Error de importación: {err_msg}")
+    
+    def toggle_pause(self):
+        """Pausa o reanuda el inicio de nuevas descargas de la cola"""
+        if self.scheduler.is_paused():
+            self.scheduler.resume()
+            self.btn_pause.setText("Pausar")
+            self.status_lbl.setText("Cola reanudada.")
+        else:
+            self.scheduler.pause()
+            self.btn_pause.setText("Reanudar")
+            self.status_lbl.setText("Cola en pausa: las descargas activas terminarán.")
+    
+    def show_queue_menu(self, pos):
+        """Menú contextual de la cola: priorizar o quitar pistas en espera"""
+        row_idx = self.table_queue.rowAt(pos.y())
+        job_id = next((j for j, r in self.queue_rows.items() if r == row_idx), None)
+        if job_id is None:
+            return
+        
+        menu = QMenu(self)
+        act_first = QAction("Descargar a continuación", menu)
+        act_first.triggered.connect(lambda: self.scheduler.prioritize(job_id))
+        menu.addAction(act_first)
+        act_cancel = QAction("Quitar de la cola", menu)
+        act_cancel.triggered.connect(lambda: self.cancel_queued(job_id))
+        menu.addAction(act_cancel)
+        menu.exec(self.table_queue.viewport().mapToGlobal(pos))
+    
+    def cancel_queued(self, job_id):
+        if self.scheduler.cancel(job_id):
+            row_idx = self.queue_rows.pop(job_id)
+            lbl = self.table_queue.cellWidget(row_idx, 2)
+            if lbl:
+                lbl.setText("Cancelado")
+    
+    def _queue_cell(self, job_id, column):
+        row_idx = self.queue_rows.get(job_id)
+        if row_idx is None:
+            return None
+        return self.table_queue.cellWidget(row_idx, column)
+    
+    @Slot(int)
+    def on_queue_started(self, job_id):
+        lbl = self._queue_cell(job_id, 2)
+        if lbl:
+            lbl.setText("Descargando")
+        
+    @Slot(int)
+    def on_queue_transcoding(self, job_id):
+        lbl = self._queue_cell(job_id, 2)
+        if lbl:
+            lbl.setText("Convirtiendo")
         
     @Slot(int, int)
-    def update_queue_progress(self, row_idx, val):
+    def update_queue_progress(self, job_id, val):
         try:
-            bar = self.table_queue.cellWidget(row_idx, 1)
+            bar = self._queue_cell(job_id, 1)
             if bar:
                 bar.setValue(val)
         except: pass
         
     @Slot(int, bool, str)
-    def on_queue_finished(self, row_idx, success, msg):
+    def on_queue_finished(self, job_id, success, msg):
         try:
-            bar = self.table_queue.cellWidget(row_idx, 1)
-            lbl = self.table_queue.cellWidget(row_idx, 2)
+            bar = self._queue_cell(job_id, 1)
+            lbl = self._queue_cell(job_id, 2)
             if bar:
                 bar.setValue(100 if success else 0)
             if lbl:
@@ -425,6 +613,9 @@ class SpotifyUI(PlatformUI):
             else:
                 self.status_lbl.setText(f"✖ Error en descarga: {msg}")
         except: pass
+        finally:
+            # Liberar la referencia del trabajo terminado
+            self.queue_rows.pop(job_id, None)
 
     def get_widget(self):
         return self
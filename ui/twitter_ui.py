@@ -3,14 +3,15 @@ from PySide6.QtWidgets import (
     QLabel, QPushButton, QPlainTextEdit, QLineEdit, QFrame, QFileDialog, QProgressBar
 )
 from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QFont, QPixmap, QPainter, QPainterPath
+from PySide6.QtGui import QFont, QPixmap, QImage
 import os
-import requests
-import time
 from datetime import datetime
 from threading import Lock
 
+from core.image_cache import fetch_image
 from ui.base_ui import PlatformUI
+from ui.images import AspectRatioLabel, PREVIEW_MAX_SIZE, decode_image
+from ui.progress import progress_channel
 from downloaders.twitter import TwitterDownloader
 
 # ===== PALETA =====
@@ -27,7 +28,7 @@ class TwitterDownloadThread(QThread):
     """Thread de descarga para Twitter"""
     progress_updated = Signal(int)
     info_updated = Signal(str, str, str, str, str, str)  # author, views, date, duration, size, description
-    preview_updated = Signal(bytes)
+    preview_updated = Signal(QImage, str)  # miniatura ya decodificada, url de origen
     console_message = Signal(str, str)
     download_finished = Signal()
     
@@ -36,6 +37,8 @@ class TwitterDownloadThread(QThread):
         self.url = url
         self.output_path = output_path
         self.downloader = downloader
+        # Progreso con throttling hacia la GUI (ui.progress)
+        self._progress = progress_channel(self.progress_updated.emit)
         self.is_running = True
     
     def run(self):
@@ -61,19 +64,19 @@ class TwitterDownloadThread(QThread):
             
             if thumbnail_url:
                 try:
-                    thumb_response = requests.get(thumbnail_url, timeout=10)
-                    if thumb_response.status_code == 200:
-                        self.preview_updated.emit(thumb_response.content)
+                    # Caché en disco: una miniatura ya vista no se vuelve a bajar
+                    thumb_data = fetch_image(thumbnail_url)
+                    if thumb_data:
+                        # Decodificar y reducir aquí, no en el hilo de la GUI
+                        self.preview_updated.emit(decode_image(thumb_data, PREVIEW_MAX_SIZE), thumbnail_url)
                 except:
                     pass
             
-            time.sleep(1)
-            
             self.console_message.emit("↓ Descargando contenido en alta calidad...", "info")
             
             def progress_callback(progress_ratio):
                 percent = int(progress_ratio * 100)
-                self.progress_updated.emit(percent)
+                self._progress(percent)
             
             success, title = self.downloader.download_audio(
                 self.url,
@@ -90,6 +93,7 @@ class TwitterDownloadThread(QThread):
             self.console_message.emit(f"✖ Error: {str(e)}", "error")
         
         finally:
+            self._progress.discard()
             self.download_finished.emit()
     
     def _format_views(self, views):
@@ -138,42 +142,6 @@ class TwitterDownloadThread(QThread):
         except:
             return "N/A"
 
-class AspectRatioLabel(QLabel):
-    """Label que mantiene el aspect ratio con bordes redondeados"""
-    def __init__(self, text="", parent=None):
-        super().__init__(text, parent)
-        self.setMinimumSize(1, 1)
-        self.setScaledContents(False) 
-        self.pixmap_original = None
-        self.setAlignment(Qt.AlignCenter)
-        self.radius = 14
-
-    def setPixmap(self, pixmap):
-        self.pixmap_original = pixmap
-        self.update_pixmap()
-
-    def resizeEvent(self, event):
-        self.update_pixmap()
-        super().resizeEvent(event)
-
-    def update_pixmap(self):
-        if self.pixmap_original and not self.pixmap_original.isNull():
-            scaled = self.pixmap_original.scaled(
-                self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
-            rounded = QPixmap(scaled.size())
-            rounded.fill(Qt.transparent)
-            painter = QPainter(rounded)
-            painter.setRenderHint(QPainter.Antialiasing)
-            path = QPainterPath()
-            path.addRoundedRect(0, 0, scaled.width(), scaled.height(), self.radius, self.radius)
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, scaled)
-            painter.end()
-            super().setPixmap(rounded)
-        else:
-            pass
-
 class TwitterUI(PlatformUI):
     
     def __init__(self, parent_widget: QWidget, console_lock: Lock):
@@ -315,7 +283,7 @@ class TwitterUI(PlatformUI):
         preview_title.setAlignment(Qt.AlignCenter)
         preview_layout.addWidget(preview_title)
         
-        self.preview_label = AspectRatioLabel("Sin vista previa")
+        self.preview_label = AspectRatioLabel("Sin vista previa", radius=RADIUS)
         self.preview_label.setFixedWidth(270)
         self.preview_label.setStyleSheet(f"background-color: {BG_PANEL}; border-radius: {RADIUS}px; color: {TEXT_SEC};")
         self.preview_label.setSizePolicy(self.preview_label.sizePolicy().horizontalPolicy(), self.preview_label.sizePolicy().verticalPolicy())
@@ -405,12 +373,11 @@ class TwitterUI(PlatformUI):
         self.size_label.setText(size)
         self.description_label.setText(description)
     
-    @Slot(bytes)
-    def set_preview_image(self, image_data):
+    @Slot(QImage, str)
+    def set_preview_image(self, image, url):
         try:
-            pixmap = QPixmap()
-            if pixmap.loadFromData(image_data):
-                self.preview_label.setPixmap(pixmap)
+            if not image.isNull():
+                self.preview_label.setImage(image, url)
             else:
                 self.preview_label.setText("Error al cargar imagen")
         except Exception as e:
@@ -1,16 +1,19 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QPushButton, QPlainTextEdit, QLineEdit, QFrame, QFileDialog
+    QLabel, QPushButton, QPlainTextEdit, QLineEdit, QFrame, QFileDialog, QComboBox,
+    QSizePolicy
 )
-from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QFont, QPixmap
-import time
+from PySide6.QtCore import Qt, QThread, QTimer, Signal, Slot
+from PySide6.QtGui import QFont, QPixmap, QTextCursor
 import re
 import os
+import queue
+import threading
 from threading import Lock
 
-from downloaders.youtube import YouTubeDownloader
+from downloaders.youtube import YouTubeDownloader, is_listing_url
 from ui.base_ui import PlatformUI
+from ui.progress import progress_channel
 
 # ===== PALETA =====
 BG_MAIN  = "#0E1116"
@@ -22,81 +25,227 @@ ERROR    = "#F7768E"
 TEXT_MAIN = "#FFFFFF"
 RADIUS   = 14
 
+# ===== DESCARGAS PARALELAS =====
+DEFAULT_PARALLEL_DOWNLOADS = 4
+MAX_PARALLEL_DOWNLOADS = 8
+# URLs resueltas que esperan worker. Al expandir una playlist o canal el
+# listado se sigue paginando a medida que la cola baja, no todo por adelantado
+QUEUE_AHEAD = 50
+QUEUE_POLL = 0.2
+
+# Los resultados se pintan en lote en la consola cada CONSOLE_FLUSH_MS
+CONSOLE_FLUSH_MS = 250
+# Líneas conservadas por sección (Exitosos / Fallidos); las más antiguas se descartan
+CONSOLE_MAX_LINES = 500
+
 
 class DownloadThread(QThread):
-    """Thread de descarga con signals"""
+    """Thread de descarga con signals.
+
+    Coordina un pool acotado de workers que ejecutan download_audio en
+    paralelo; cada worker ocupa un "slot" fijo para reportar su progreso.
+    Mientras tanto este hilo expande las playlists y canales y va llenando
+    la cola, así las primeras descargas empiezan antes de tener el listado.
+    """
     progress_updated = Signal(int, str)  # queue_count, progress_percentage
     stats_updated = Signal(int, int, int, int)  # queue, progress_num, successful, failed
-    title_updated = Signal(str)
+    queue_updated = Signal(int)  # queue_count (crece mientras se expanden listados)
+    slot_updated = Signal(int, str, str)  # slot, title, progress_percentage
     success_added = Signal(str)
     failed_added = Signal(str)
     error_occurred = Signal(str)
     download_finished = Signal()
     
-    def __init__(self, urls, output_path, downloader):
+    def __init__(self, urls, output_path, downloader, max_workers=DEFAULT_PARALLEL_DOWNLOADS):
         super().__init__()
         self.urls = urls
         self.output_path = output_path
         self.downloader = downloader
+        self.max_workers = max(1, min(max_workers, MAX_PARALLEL_DOWNLOADS))
         self.successful_downloads = []
         self.failed_downloads = []
         self.is_running = True
+        self._pending = queue.Queue(maxsize=QUEUE_AHEAD)
+        self._expanded = threading.Event()
+        self._stats_lock = Lock()
+        self._stats_cond = threading.Condition(self._stats_lock)
+        self._total = 0
+        self._completed = 0
+        self._transcoding = 0
+        # Progreso por fragmento de yt-dlp: se entrega a la GUI a 10 Hz (ui.progress)
+        self._progress = progress_channel(self.progress_updated.emit)
+        self._slots = progress_channel(self.slot_updated.emit)
     
     def run(self):
         """Ejecuta las descargas"""
         try:
-            total = len(self.urls)
+            self.stats_updated.emit(0, 0, 0, 0)
             
-            for idx, url in enumerate(self.urls):
-                if not self.is_running:
-                    break
-                
-                self.stats_updated.emit(
-                    total - idx,
-                    0,
-                    len(self.successful_downloads),
-                    len(self.failed_downloads)
-                )
-                
-                def progress_callback(percent, speed, eta):
-                    match = re.search(r'[\d.]+%', percent)
-                    percent_only = match.group() if match else "0%"
-                    self.progress_updated.emit(total - idx - 1, percent_only)
-                
-                def title_callback(title):
-                    self.title_updated.emit(title)
-                
-                success, title = self.downloader.download_audio(
-                    url, self.output_path, progress_callback, title_callback
-                )
-                
-                if success and title:
-                    self.successful_downloads.append(title)
-                    self.success_added.emit(title)
-                    self.stats_updated.emit(
-                        total - idx - 1,
-                        100,
-                        len(self.successful_downloads),
-                        len(self.failed_downloads)
-                    )
-                else:
-                    self.failed_downloads.append(url)
-                    self.failed_added.emit(url)
-                    self.stats_updated.emit(
-                        total - idx - 1,
-                        0,
-                        len(self.successful_downloads),
-                        len(self.failed_downloads)
-                    )
+            workers = [
+                threading.Thread(target=self._worker, args=(slot,), daemon=True)
+                for slot in range(self.max_workers)
+            ]
+            for worker in workers:
+                worker.start()
+            try:
+                self._expand()
+            finally:
+                self._expanded.set()
+            for worker in workers:
+                worker.join()
+            # Con stop() lo que quedó en la cola nunca se descarga
+            self._abandon(self._drain_pending())
+            
+            # Esperar las conversiones pendientes antes de dar la cola por terminada
+            with self._stats_cond:
+                self._stats_cond.wait_for(lambda: self._transcoding == 0)
         
         except Exception as e:
             self.error_occurred.emit(f"Error durante la descarga: {str(e)}")
         
         finally:
+            self._progress.discard()
+            self._slots.discard()
             self.download_finished.emit()
     
+    def _expand(self):
+        """Encola las URLs; las playlists y canales se expanden entrada por entrada"""
+        for url in self.urls:
+            if not self.is_running:
+                return
+            if not is_listing_url(url):
+                self._enqueue(url)
+                continue
+            listing = self.downloader.iter_listing(url)
+            try:
+                for video_url in listing:
+                    if not self.is_running:
+                        return
+                    self._enqueue(video_url)
+            except Exception as e:
+                print(f"✖ Error expandiendo la lista {url}: {e}")
+                with self._stats_lock:
+                    self._total += 1
+                self._record_result(url, False, '')
+            finally:
+                listing.close()
+    
+    def _enqueue(self, url):
+        with self._stats_lock:
+            self._total += 1
+            # Emitir sin agrupar y dentro del lock, igual que stats_updated en
+            # _record_result: así un conteo viejo nunca pisa a uno más nuevo
+            self.queue_updated.emit(self._total - self._completed)
+        # Cola llena: esperar a los workers sin dejar de atender stop()
+        while self.is_running:
+            try:
+                self._pending.put(url, timeout=QUEUE_POLL)
+                return
+            except queue.Full:
+                continue
+        self._abandon(1)
+    
+    def _drain_pending(self):
+        """Vacía la cola y devuelve cuántas URLs quedaban sin tomar"""
+        count = 0
+        while True:
+            try:
+                self._pending.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+    
+    def _abandon(self, count):
+        """Descuenta del total las URLs que stop() dejó sin descargar"""
+        if not count:
+            return
+        with self._stats_lock:
+            self._total -= count
+            self.queue_updated.emit(self._total - self._completed)
+    
+    def _worker(self, slot):
+        """Toma URLs de la cola compartida hasta que se vacía y termina la expansión, o se detiene"""
+        while self.is_running:
+            try:
+                url = self._pending.get(timeout=QUEUE_POLL)
+            except queue.Empty:
+                if self._expanded.is_set() and self._pending.empty():
+                    break
+                continue
+            
+            slot_title = [url]
+            
+            def progress_callback(percent, speed, eta):
+                match = re.search(r'[\d.]+%', percent)
+                percent_only = match.group() if match else "0%"
+                self._progress(self._remaining(), percent_only)
+                self._slots(slot, slot_title[0], percent_only, key=slot)
+            
+            def title_callback(title):
+                # yt-dlp envía '-' al terminar la descarga; se conserva el título del slot
+                if title != '-':
+                    slot_title[0] = title
+                self._slots(slot, slot_title[0], "0%" if title != '-' else "100%", key=slot)
+            
+            try:
+                # Etapa de red: el slot se libera cuando el stream crudo está en disco
+                future, _ = self.downloader.fetch_audio(
+                    url, self.output_path, progress_callback, title_callback
+                )
+            except Exception as e:
+                print(f"✖ Error en slot {slot + 1} procesando {url}: {e}")
+                future = None
+            
+            if future is None:
+                self._record_result(url, False, '')
+            else:
+                # La conversión a MP3 termina en el pool de CPU (core.transcoder)
+                with self._stats_lock:
+                    self._transcoding += 1
+                future.add_done_callback(
+                    lambda f, url=url: self._record_result(url, *self._future_result(f), transcoded=True)
+                )
+            
+            self._slots(slot, "", "", key=slot)
+    
+    @staticmethod
+    def _future_result(future):
+        try:
+            return future.result()
+        except Exception:
+            return False, ''
+    
+    def _record_result(self, url, success, title, transcoded=False):
+        """Registra el resultado final de una URL y emite los contadores"""
+        with self._stats_cond:
+            self._completed += 1
+            if success and title:
+                self.successful_downloads.append(title)
+            else:
+                self.failed_downloads.append(url)
+            stats = (
+                self._total - self._completed,
+                100 if success and title else 0,
+                len(self.successful_downloads),
+                len(self.failed_downloads)
+            )
+            # Emitir dentro del lock mantiene el orden de los contadores
+            if success and title:
+                self.success_added.emit(title)
+            else:
+                self.failed_added.emit(url)
+            self.stats_updated.emit(*stats)
+            
+            if transcoded:
+                self._transcoding -= 1
+                self._stats_cond.notify_all()
+    
+    def _remaining(self):
+        with self._stats_lock:
+            return self._total - self._completed
+    
     def stop(self):
-        """Detiene el thread"""
+        """Detiene el thread (las descargas en curso terminan, no se inician nuevas)"""
         self.is_running = False
 
 
@@ -110,6 +259,19 @@ class YouTubeUI(PlatformUI):
         self.failed_downloads = []
         self.is_downloading = False
         self.download_thread = None
+        self.slot_status = {}
+        
+        # Entradas de consola pendientes: un QTimer las pinta en lote sin
+        # bloquear el hilo de la GUI
+        self._console_pending = {'success': [], 'failed': []}
+        self.console_timer = QTimer(self)
+        self.console_timer.setSingleShot(True)
+        self.console_timer.setInterval(CONSOLE_FLUSH_MS)
+        self.console_timer.timeout.connect(self.flush_console)
+        # Líneas visibles bajo cada encabezado: ubican el bloque "✖ Fallidos:"
+        # sin leer el texto de la consola
+        self._console_success_lines = 0
+        self._console_failed_lines = 0
         
         # Referencias a widgets
         self.queue_value_label = None
@@ -159,7 +321,7 @@ class YouTubeUI(PlatformUI):
         links_frame_layout.setContentsMargins(10, 10, 10, 10)
         
         self.links = QPlainTextEdit()
-        self.links.setPlaceholderText("https://youtube.com/...")
+        self.links.setPlaceholderText("https://youtube.com/... (videos, playlists o canales)")
         self.links.setMinimumHeight(120)
         self.links.setFrameShape(QFrame.NoFrame) # Quitar borde nativo
         self.links.setStyleSheet("background-color: transparent; color: white;")
@@ -218,6 +380,8 @@ class YouTubeUI(PlatformUI):
         info_layout.addWidget(info_title)
         
         self.video_title = QLabel("Esperando descarga")
+        # Con varios slots activos el texto puede ser largo: no debe ensanchar la ventana
+        self.video_title.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)
         info_layout.addWidget(self.video_title)
         
         main_layout.addWidget(info_frame, 2, 0, 1, 2)
@@ -295,6 +459,17 @@ class YouTubeUI(PlatformUI):
         choose_button.clicked.connect(self.select_folder)
         dest_layout.addWidget(choose_button)
         
+        dest_layout.addSpacing(10)
+        parallel_label = QLabel("Simultáneas:")
+        parallel_label.setStyleSheet("background-color: transparent;")
+        dest_layout.addWidget(parallel_label)
+        
+        self.parallel_combo = QComboBox()
+        self.parallel_combo.addItems([str(n) for n in range(1, MAX_PARALLEL_DOWNLOADS + 1)])
+        self.parallel_combo.setCurrentText(str(DEFAULT_PARALLEL_DOWNLOADS))
+        self.parallel_combo.setFixedSize(70, 40)
+        dest_layout.addWidget(self.parallel_combo)
+        
         main_layout.addWidget(dest_container, 4, 0, 1, 2)
         
         # ================== 6. CONSOLA (Fila 5) ==================
@@ -334,6 +509,8 @@ class YouTubeUI(PlatformUI):
         self.console.setFont(QFont("Segoe UI", 10))
         self.console.setMinimumHeight(100)
         self.console.setReadOnly(True)
+        # Sin historial de deshacer: la consola solo crece por código
+        self.console.setUndoRedoEnabled(False)
         self.console.setFrameShape(QFrame.NoFrame)
         self.console.setStyleSheet("background-color: transparent; color: white;")
         self.console.setPlainText("✔ Exitosos:\n✖ Fallidos:")
@@ -375,6 +552,21 @@ class YouTubeUI(PlatformUI):
                 border-radius: {RADIUS}px;
             }}
             
+            QComboBox {{
+                background-color: {BG_PANEL};
+                border: none;
+                border-radius: 8px;
+                padding: 0 10px;
+                color: white;
+            }}
+            
+            QComboBox QAbstractItemView {{
+                background-color: {BG_PANEL};
+                color: white;
+                selection-background-color: {ACCENT};
+                outline: none;
+            }}
+            
             QPushButton {{
                 background-color: {ACCENT};
                 border: none;
@@ -485,29 +677,89 @@ class YouTubeUI(PlatformUI):
         if self.failed_value_label:
             self.failed_value_label.setText(str(failed))
     
+    @Slot(int)
+    def update_queue_count(self, queue_count):
+        """Actualiza la cola mientras se expanden playlists y canales"""
+        if self.queue_value_label:
+            self.queue_value_label.setText(str(queue_count))
+    
+    @Slot(int, str, str)
+    def update_slot(self, slot, title, percent):
+        """Actualiza el estado de un slot de descarga y lo refleja en el título"""
+        if title:
+            self.slot_status[slot] = f"[{slot + 1}] {title} — {percent}"
+        else:
+            self.slot_status.pop(slot, None)
+        
+        if self.slot_status:
+            self.video_title.setText("   |   ".join(
+                self.slot_status[key] for key in sorted(self.slot_status)
+            ))
+        elif self.is_downloading:
+            self.video_title.setText("Esperando descarga")
+    
     @Slot(str)
     def add_success_to_console(self, title):
-        """Agrega un título exitoso a la consola"""
-        with self.console_lock:
-            current_text = self.console.toPlainText()
-            failed_pos = current_text.find("✖ Fallidos:")
-            
-            if failed_pos != -1:
-                before = current_text[:failed_pos]
-                after = current_text[failed_pos:]
-                new_text = f"{before}  {len(self.successful_downloads)}. {title}\n{after}"
-                self.console.setPlainText(new_text)
-            else:
-                self.console.appendPlainText(f"  {len(self.successful_downloads)}. {title}")
-        
-        time.sleep(1)
+        """Agrega un título exitoso a la consola (en el próximo lote)"""
+        self._queue_console('success', f"  {len(self.successful_downloads)}. {title}")
     
     @Slot(str)
     def add_failed_to_console(self, title):
-        """Agrega un título fallido a la consola"""
+        """Agrega un título fallido a la consola (en el próximo lote)"""
+        self._queue_console('failed', f"  {len(self.failed_downloads)}. {title}")
+    
+    def _queue_console(self, kind, line):
+        self._console_pending[kind].append(line)
+        if not self.console_timer.isActive():
+            self.console_timer.start()
+    
+    def _reset_console(self):
+        """Descarta entradas pendientes y deja la consola con los encabezados"""
+        self.console_timer.stop()
+        self._console_pending = {'success': [], 'failed': []}
+        with self.console_lock:
+            self.console.setPlainText("✔ Exitosos:\n✖ Fallidos:")
+            self._console_success_lines = 0
+            self._console_failed_lines = 0
+    
+    @Slot()
+    def flush_console(self):
+        """Pinta en la consola todas las entradas acumuladas desde el último lote.
+
+        Inserta con QTextCursor en el bloque correspondiente: el costo depende
+        del tamaño del lote, no de cuántas líneas tenga ya la consola.
+        """
+        successes = self._console_pending['success']
+        failures = self._console_pending['failed']
+        self._console_pending = {'success': [], 'failed': []}
+        
         with self.console_lock:
-            self.console.appendPlainText(f"  {len(self.failed_downloads)}. {title}")
-        time.sleep(1)
+            document = self.console.document()
+            if successes:
+                # Bloque 0 = "✔ Exitosos:", luego las líneas de éxito y después "✖ Fallidos:"
+                cursor = QTextCursor(document.findBlockByNumber(1 + self._console_success_lines))
+                cursor.insertText("\n".join(successes) + "\n")
+                self._console_success_lines += len(successes)
+                excess = self._console_success_lines - CONSOLE_MAX_LINES
+                if excess > 0:
+                    self._remove_console_blocks(1, excess)
+                    self._console_success_lines -= excess
+            if failures:
+                self.console.appendPlainText("\n".join(failures))
+                self._trim_failed_lines(len(failures))
+    
+    def _trim_failed_lines(self, added):
+        """Cuenta líneas nuevas bajo "✖ Fallidos:" y descarta las más antiguas si sobran"""
+        self._console_failed_lines += added
+        excess = self._console_failed_lines - CONSOLE_MAX_LINES
+        if excess > 0:
+            self._remove_console_blocks(2 + self._console_success_lines, excess)
+            self._console_failed_lines -= excess
+    
+    def _remove_console_blocks(self, first_block, count):
+        cursor = QTextCursor(self.console.document().findBlockByNumber(first_block))
+        cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor, count)
+        cursor.removeSelectedText()
     
     @Slot(str)
     def show_console_error(self, message):
@@ -515,11 +767,11 @@ class YouTubeUI(PlatformUI):
         with self.console_lock:
             # Usar símbolo ✖ para consistencia y sin saltos extra
             self.console.appendPlainText(f"✖ {message}")
+            self._trim_failed_lines(message.count("\n") + 1)
     
     def clear_console(self):
         """Limpia la consola"""
-        with self.console_lock:
-            self.console.setPlainText("✔ Exitosos:\n✖ Fallidos:")
+        self._reset_console()
     
     def start_download(self):
         """Inicia el proceso de descarga"""
@@ -544,8 +796,7 @@ class YouTubeUI(PlatformUI):
         self.is_downloading = True
         self.download_button.setEnabled(False)
         
-        with self.console_lock:
-            self.console.setPlainText("✔ Exitosos:\n✖ Fallidos:")
+        self._reset_console()
         
         # Reiniciar información visual
         self.video_title.setText("Esperando descarga")
@@ -562,10 +813,13 @@ class YouTubeUI(PlatformUI):
             self.preview_label.setText("Vista previa")
         
         # Crear y conectar el thread
-        self.download_thread = DownloadThread(urls, output_path, self.downloader)
+        self.slot_status = {}
+        max_workers = int(self.parallel_combo.currentText())
+        self.download_thread = DownloadThread(urls, output_path, self.downloader, max_workers)
         self.download_thread.progress_updated.connect(lambda q, p: self.progress_value_label.setText(p))
         self.download_thread.stats_updated.connect(self.update_stats)
-        self.download_thread.title_updated.connect(lambda t: self.video_title.setText(t))
+        self.download_thread.queue_updated.connect(self.update_queue_count)
+        self.download_thread.slot_updated.connect(self.update_slot)
         self.download_thread.success_added.connect(self.on_success_added)
         self.download_thread.failed_added.connect(self.on_failed_added)
         self.download_thread.error_occurred.connect(self.show_console_error)
@@ -587,8 +841,12 @@ class YouTubeUI(PlatformUI):
     @Slot()
     def on_download_finished(self):
         """Maneja cuando termina la descarga"""
+        self.slot_status = {}
         self.is_downloading = False
         self.download_button.setEnabled(True)
+        # Pintar lo que quede sin esperar al próximo lote
+        self.console_timer.stop()
+        self.flush_console()
     
     def show(self):
         """Muestra la interfaz"""